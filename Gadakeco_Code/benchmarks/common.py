@@ -0,0 +1,127 @@
+"""
+Shared helpers of the benchmarks: import setup, timing, genome fixtures and result files.
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), "src")
+FIXTURE_DIR = os.path.join(BENCHMARK_DIR, "fixtures")
+GENOME_FIXTURES = os.path.join(FIXTURE_DIR, "genomes.json")
+POPULATION_FIXTURE = os.path.join(FIXTURE_DIR, "population.json")
+
+# the game is started from 'src', and the neat package imports itself as 'src.neat'
+for path in (os.path.dirname(SRC_DIR), SRC_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# copying and pickling a network recurses along its edges, which exceeds the default limit for the large genome
+sys.setrecursionlimit(20000)
+
+from neat.network import Edge, Network  # noqa: E402
+from neat.node import HiddenNode  # noqa: E402
+from neat.population import Population  # noqa: E402
+
+
+def measure(func, repeat=5, number=1, setup=None):
+    """
+    Times 'func' like 'timeit': 'repeat' rounds of 'number' calls each.
+
+    Parameters
+    ----------
+        func: callable
+            Called with the return value of 'setup' (if given) or without arguments.
+        repeat: int
+            Number of rounds.
+        number: int
+            Number of calls per round.
+        setup: callable
+            Called before each round (not timed), e.g. to create fresh copies of the input.
+
+    Returns
+    -------
+        dict
+            Seconds per call: "median" of the rounds (compared by run.py), "time" of the fastest round and "mean" over
+            all rounds; "spread" is the range of the rounds relative to the median (how noisy the measurement is).
+    """
+    times = []
+    for _ in range(repeat):
+        args = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        for _ in range(number):
+            func(*args)
+        times.append((time.perf_counter() - start) / number)
+    median = statistics.median(times)
+    return {"time": min(times), "median": median, "mean": sum(times) / len(times),
+            "spread": (max(times) - min(times)) / median if median > 0 else 0.0, "repeat": repeat, "number": number}
+
+
+def genome_to_dict(network):
+    # the first 489 nodes (input and output) are the same in every network
+    indices = {id(node): i for i, node in enumerate(network.nodes)}
+    edges = sorted([indices[id(edge.get_begin())], indices[id(edge.get_end())], edge.get_weight()]
+                   for edge in network.edges)
+    return {
+        "hidden_layers": [node.get_layer() for node in network.nodes[489:]],
+        "edges": edges,
+        "fitness": network.fitness,
+    }
+
+
+def genome_from_dict(genome):
+    network = Network()
+    for layer in genome["hidden_layers"]:
+        network.nodes.append(HiddenNode(layer=layer))
+    for begin, end, weight in genome["edges"]:
+        network.edges.add(Edge(network.nodes[begin], network.nodes[end], weight))
+    network.fitness = genome["fitness"]
+    return network
+
+
+def load_genomes():
+    """
+    Returns the frozen genomes of 'fixtures/genomes.json' (see make_fixtures.py) by name.
+    """
+    with open(GENOME_FIXTURES) as file:
+        return {name: genome_from_dict(genome) for name, genome in json.load(file).items()}
+
+
+def load_population():
+    """
+    Returns the frozen population of 'fixtures/population.json' (see make_fixtures.py).
+    """
+    with open(POPULATION_FIXTURE) as file:
+        data = json.load(file)
+    pop = Population(data["seed"], 0)
+    pop.name = data["name"]
+    pop.size = data["size"]
+    pop.generation_count = data["generation_count"]
+    pop.current_generation = [genome_from_dict(genome) for genome in data["genomes"]]
+    return pop
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.time(),
+    }
+
+
+def write_json(path, data, indent=2):
+    with open(path, "w") as file:
+        json.dump(data, file, indent=indent, sort_keys=True)
+        file.write("\n")
+
+
+def read_json(path):
+    with open(path) as file:
+        return json.load(file)
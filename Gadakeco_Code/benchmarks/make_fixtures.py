@@ -0,0 +1,73 @@
+"""
+Freezes genomes of the saved populations ('res/networks/*.pop') into 'fixtures/genomes.json', so the benchmarks don't
+change when populations are trained further or removed:
+    small:  the smallest saved network
+    medium: the largest saved network
+    large:  the largest saved network grown by seeded mutations (the saved networks are still small)
+and the most trained saved population (with its world seed) into 'fixtures/population.json'.
+
+Usage:
+    python make_fixtures.py [--grow-edges N] [--grow-nodes N]
+"""
+
+import argparse
+import glob
+import random
+
+from common import GENOME_FIXTURES, POPULATION_FIXTURE, genome_to_dict, write_json
+from lib import constants
+from neat.population import Population
+
+
+def genome_size(network):
+    return len(network.nodes) + len(network.edges)
+
+
+def freeze_population(populations):
+    # the population with the most generations behind it
+    pop = max(populations, key=lambda p: (p.generation_count, p.name))
+    write_json(POPULATION_FIXTURE, {
+        "name": pop.name,
+        "seed": pop.seed,
+        "size": pop.size,
+        "generation_count": pop.generation_count,
+        "genomes": [genome_to_dict(net) for net in pop.current_generation],
+    }, indent=None)
+    print("population: {} (seed {}, generation {})".format(pop.name, pop.seed, pop.generation_count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="freeze genome fixtures from the saved populations")
+    parser.add_argument("--grow-edges", type=int, default=400, help="edge mutations for the large genome")
+    parser.add_argument("--grow-nodes", type=int, default=40, help="node mutations for the large genome")
+    args = parser.parse_args()
+
+    populations = [Population.load_from_file(filename)
+                   for filename in sorted(glob.glob(constants.res_loc("networks") + "*.pop"))]
+    if not populations:
+        raise SystemExit("no saved populations in " + constants.res_loc("networks"))
+    freeze_population(populations)
+
+    networks = sorted((net for pop in populations for net in pop.current_generation), key=genome_size)
+
+    genomes = {
+        "small": genome_to_dict(networks[0]),
+        "medium": genome_to_dict(networks[-1]),
+    }
+
+    # grow the largest network by a seeded mix of edge and node mutations
+    rng = random.Random(0)
+    mutations = ["edge"] * args.grow_edges + ["node"] * args.grow_nodes
+    rng.shuffle(mutations)
+    grown = networks[-1]
+    for mutation in mutations:
+        grown = grown.node_mutation(rng) if mutation == "node" else grown.edge_mutation(rng)
+    genomes["large"] = genome_to_dict(grown)
+
+    write_json(GENOME_FIXTURES, genomes)
+    for name, genome in genomes.items():
+        print("{}: {} hidden nodes, {} edges".format(name, len(genome["hidden_layers"]), len(genome["edges"])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""
+Benchmarks of the simulation and NEAT hot paths.
+
+Usage:
+    python run.py [--output results.json] [--baseline baseline.json] [--threshold 0.2] [--filter NAME]
+    python run.py --save-baseline              (records baseline.json on this machine)
+
+The results are the median time per call of each benchmark over several rounds. Only if a baseline was saved on this
+machine (it isn't part of the repository), the results are compared with it: every benchmark whose median got slower
+than its threshold is reported as a regression and the exit code is 1. The threshold is 'threshold' (relative, or the
+one stored for the benchmark in the baseline), 'micro_threshold' for benchmarks faster than 'micro_time', and never
+less than the spread of the rounds, so noisy measurements don't count as regressions. A baseline that was recorded on
+a different machine is compared for information only.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+from copy import deepcopy
+
+from common import (BENCHMARK_DIR, load_genomes, machine_info, measure, read_json, write_json)
+from aabb import AABB
+from entity.entitybase import EntityBase
+from entity.entityenemy import EntityEnemy
+from lib import constants
+from neat.population import Population
+from world import NeuronalWorld, World
+from worldgeneration.worldgen import WorldSlice
+
+BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+# fixed seeds of the world generator
+SEEDS = (1, 42, 777)
+# benchmarks faster than this many seconds per call are compared with 'micro_threshold'
+micro_time = 1e-3
+micro_threshold = 0.5
+
+
+def fixed_minimap(seed=0):
+    # a reproducible minimap with mostly empty tiles, some blocks and a few enemies
+    rng = random.Random(seed)
+    return [rng.choice((0, 0, 0, 0, 1, 1, -1)) for _ in range(18 * 27)]
+
+
+def bench_network_evaluate(genomes):
+    minimap = fixed_minimap()
+    return {"network_evaluate_" + name: measure(lambda: net.evaluate(minimap), repeat=9, number=1000)
+            for name, net in genomes.items()}
+
+
+def _advanced_world(seed, network, ticks):
+    world = NeuronalWorld(seed, network, detectStuck=False)
+    world.generatePlatform()
+    for _ in range(ticks):
+        if not world.update(constants.UPS):
+            break
+    return world
+
+
+def bench_world_update(genomes, ticks=600):
+    """
+    physic updates of 'NeuronalWorld' with the medium genome; ended episodes are restarted, only updates are timed
+    """
+    def run():
+        done = 0
+        for seed in SEEDS:
+            world = NeuronalWorld(seed, deepcopy(genomes["medium"]), detectStuck=False)
+            world.generatePlatform()
+            for _ in range(ticks):
+                done += 1
+                if not world.update(constants.UPS):
+                    world = NeuronalWorld(seed, deepcopy(genomes["medium"]), detectStuck=False)
+                    world.generatePlatform()
+        return done
+
+    result = measure(run, repeat=3)
+    result["ticks_per_second"] = len(SEEDS) * ticks / result["median"]
+    return {"world_update": result}
+
+
+def bench_minimap(genomes):
+    worlds = [_advanced_world(seed, deepcopy(genomes["medium"]), 100) for seed in SEEDS]
+
+    def run():
+        for world in worlds:
+            world.createMinimapValues()
+
+    return {"create_minimap_values": measure(run, repeat=9, number=100)}
+
+
+def _dense_scene():
+    # a 12x8 grid of 40x40 blocks with gaps and a crowd of enemies inside it
+    blocks = [EntityBase(x * 40, y * 40, 40, 40) for x in range(12) for y in range(8) if (x + y) % 3 != 0]
+    enemies = [EntityEnemy(20 + x * 37, 15 + y * 53) for x in range(12) for y in range(6)]
+    return blocks, enemies
+
+
+def bench_collision():
+    blocks, enemies = _dense_scene()
+    boxes = [(AABB(b.getX() - 25, b.getY() - 30, 40, 40), b.getX() - 30, b.getY() - 45, b._aabb) for b in blocks]
+
+    def response(boxes):
+        for box, lastX, lastY, other in boxes:
+            box.collisionResponse(lastX, lastY, other)
+
+    def copies():
+        return [(AABB(box.x, box.y, box.width, box.height), lastX, lastY, other) for box, lastX, lastY, other in boxes]
+
+    world = World(0)
+    world.visibleStaticEntities = blocks
+
+    def updates(livings):
+        world.visibleDynamicEntities = livings
+        for living in livings:
+            living.updateAndIsAlive(world, constants.UPS)
+
+    return {
+        "aabb_collision_response": measure(response, repeat=9, number=1, setup=copies),
+        "living_update_dense": measure(updates, repeat=9, number=1, setup=lambda: deepcopy(enemies)),
+    }
+
+
+def _population(genomes, size):
+    # a population of copies of the fixtures with reproducible, distinct fitness values
+    rng = random.Random(size)
+    pop = Population(0, 0)
+    pop.size = size
+    templates = list(genomes.values())
+    for i in range(size):
+        net = deepcopy(templates[i % len(templates)])
+        net.fitness = rng.uniform(-100, 1000)
+        pop.current_generation.append(net)
+    return pop
+
+
+def bench_create_next_generation(genomes, sizes):
+    results = {}
+    for size in sizes:
+        pop = _population(genomes, size)
+
+        # create_next_generation replaces the generation, so every round needs its own population (the copies share
+        # the state of the random generator, so every round creates the same networks)
+        results["create_next_generation_{}".format(size)] = measure(Population.create_next_generation,
+                                                                    repeat=3 if size <= 100 else 1,
+                                                                    setup=lambda: deepcopy(pop))
+    return results
+
+
+def bench_parse_slices():
+    return {"world_slice_parse_all": measure(WorldSlice.parseAll, repeat=5)}
+
+
+def bench_population_pickle(genomes):
+    pop = _population(genomes, 100)
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.pop")
+    stdout = sys.stdout
+    try:
+        # save_to_file and load_from_file print a line for every call
+        sys.stdout = open(os.devnull, "w")
+        save = measure(lambda: pop.save_to_file(path), repeat=5)
+        load = measure(lambda: Population.load_from_file(path), repeat=5)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    save["bytes"] = os.path.getsize(path)
+    os.remove(path)
+    return {"population_save": save, "population_load": load}
+
+
+def run_benchmarks(sizes, name_filter=None):
+    genomes = load_genomes()
+    suites = [
+        ("network_evaluate", lambda: bench_network_evaluate(genomes)),
+        ("world_update", lambda: bench_world_update(genomes)),
+        ("create_minimap_values", lambda: bench_minimap(genomes)),
+        ("collision", bench_collision),
+        ("create_next_generation", lambda: bench_create_next_generation(genomes, sizes)),
+        ("world_slice_parse_all", bench_parse_slices),
+        ("population_pickle", lambda: bench_population_pickle(genomes)),
+    ]
+
+    results = {}
+    for name, suite in suites:
+        if name_filter and name_filter not in name:
+            continue
+        print("running", name, flush=True)
+        results.update(suite())
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns the lines of the comparison and the names of the benchmarks that regressed (see the module docstring).
+    """
+    lines = []
+    regressions = []
+    for name in sorted(results):
+        new = results[name]["median"]
+        if name not in baseline:
+            lines.append("{:<32}{:>12.6f}s (new)".format(name, new))
+            continue
+        # (baselines of older versions only have the fastest round)
+        old = baseline[name].get("median", baseline[name]["time"])
+        change = new / old - 1.0
+        limit = baseline[name].get("threshold", micro_threshold if old < micro_time else threshold)
+        limit = max(limit, baseline[name].get("spread", 0.0) + results[name]["spread"])
+        regressed = change > limit
+        if regressed:
+            regressions.append(name)
+        lines.append("{:<32}{:>12.6f}s {:>+8.1%} (limit {:+.0%}){}".format(name, new, change, limit,
+                                                                          "  REGRESSION" if regressed else ""))
+    return lines, regressions
+
+
+def same_machine(info, other):
+    return all(info.get(key) == other.get(key) for key in ("python", "implementation", "machine", "system", "cpus"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmarks of the simulation and NEAT hot paths")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE, help="compare against this JSON file, if it exists")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store the results as the baseline of this machine")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown that counts as a regression (default 0.2 = 20%%, benchmarks faster "
+                             "than {}s use {:.0f}%%)".format(micro_time, micro_threshold * 100))
+    parser.add_argument("--filter", help="only run the suites whose name contains this")
+    parser.add_argument("--sizes", default="100,1000",
+                        help="population sizes for create_next_generation (10000 needs about 7 GB of memory)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run_benchmarks(sizes, args.filter)
+    report = {"machine": machine_info(), "results": results}
+
+    if args.output:
+        write_json(args.output, report)
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print("saved baseline", args.baseline)
+        return
+
+    if os.path.exists(args.baseline):
+        baseline = read_json(args.baseline)
+        lines, regressions = compare(results, baseline["results"], args.threshold)
+        print("\n".join(lines))
+        if not same_machine(report["machine"], baseline.get("machine", {})):
+            print("the baseline was recorded on a different machine, the comparison is only informative")
+        elif regressions:
+            print("{} regression(s): {}".format(len(regressions), ", ".join(regressions)))
+            sys.exit(1)
+    else:
+        for name in sorted(results):
+            print("{:<32}{:>12.6f}s".format(name, results[name]["median"]))
+        print("no baseline to compare with, record one on this machine with --save-baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Scaling of the headless training (main_simulation) with the number of worker processes.
+
+The frozen population of 'fixtures/population.json' is trained for a fixed number of generations with 1, 2, 4, ...
+worker processes; the mutations are seeded by the population, so every run creates the same networks. For each number
+of workers the report contains:
+    throughput:         evaluated physic updates (episode lengths) and networks per second
+    efficiency:         throughput / (workers * throughput of the fewest workers)
+    ipc_bytes_per_task: pickled bytes sent to and received from the workers per evaluated network
+    idle:               worker-seconds without a task while the generation wasn't finished (stragglers)
+
+Usage:
+    python scaling.py [--workers 1,2,4,8] [--generations 3] [--mode plain|reuse|halving] [--output scaling.json]
+"""
+
+import argparse
+import os
+import pickle
+import time
+from multiprocessing import Pool
+
+from common import load_population, machine_info, write_json
+from main_simulation import evaluate
+from training.halving import SuccessiveHalvingEvaluator
+from training.scheduler import EvaluationScheduler
+from training.trajectory import TrajectoryReuseEvaluator
+from world import NeuronalWorld
+
+
+class _RecordingPool:
+    """
+    Passes the tasks to 'pool' and keeps them and their results, so their pickled size can be measured after the
+    timed evaluation.
+    """
+    def __init__(self, pool):
+        self.pool = pool
+        self.sent = []
+        self.received = []
+
+    def imap_unordered(self, func, iterable, chunksize=1):
+        tasks = list(iterable)
+        self.sent.append((func, tasks))
+        for result in self.pool.imap_unordered(func, tasks, chunksize):
+            self.received.append(result)
+            yield result
+
+    def collect_bytes(self):
+        sent = sum(len(pickle.dumps((func, task))) for func, tasks in self.sent for task in tasks)
+        received = sum(len(pickle.dumps(result)) for result in self.received)
+        self.sent = []
+        self.received = []
+        return sent, received
+
+
+def evaluate_generation(mode, pop, scheduler, halving, reuse):
+    # returns the fitness and episode length of each network and the number of physic updates actually simulated
+    if mode == "reuse":
+        results = reuse.evaluate(pop.current_generation, pop.seed, {})
+        return results, reuse.last_ticks[0]
+
+    worlds = []
+    for net in pop.current_generation:
+        world = NeuronalWorld(pop.seed, net)
+        world.generatePlatform()
+        worlds.append(world)
+    if mode == "halving":
+        results = halving.evaluate(worlds, pop.elite_count())
+    else:
+        results = scheduler.map(evaluate, worlds, [net.episode_ticks for net in pop.current_generation])
+    return results, sum(ticks for _, ticks in results)
+
+
+def run(workers, generations, mode):
+    """
+    Trains the frozen population for 'generations' generations with 'workers' processes.
+    """
+    pop = load_population()
+
+    pool = Pool(workers)
+    recording = _RecordingPool(pool)
+    scheduler = EvaluationScheduler(recording, workers)
+    halving = SuccessiveHalvingEvaluator(scheduler)
+    reuse = TrajectoryReuseEvaluator(scheduler)
+
+    records = []
+    try:
+        for _ in range(generations):
+            start = time.perf_counter()
+            results, simulated = evaluate_generation(mode, pop, scheduler, halving, reuse)
+            wall = time.perf_counter() - start
+            busy = scheduler.collect_busy_time()
+            sent, received = recording.collect_bytes()
+
+            for net, (fitness, ticks) in zip(pop.current_generation, results):
+                net.fitness = fitness
+                net.episode_ticks = ticks
+            records.append({
+                "generation": pop.generation_count,
+                "networks": len(results),
+                "wall_time": wall,
+                "episode_ticks": sum(ticks for _, ticks in results),
+                "simulated_ticks": simulated,
+                "busy_time": busy,
+                "idle_time": max(workers * wall - busy, 0.0),
+                "bytes_sent": sent,
+                "bytes_received": received,
+            })
+            pop.create_next_generation()
+            pop.generation_count += 1
+    finally:
+        pool.terminate()
+        pool.join()
+
+    wall = sum(record["wall_time"] for record in records)
+    networks = sum(record["networks"] for record in records)
+    idle = sum(record["idle_time"] for record in records)
+    return {
+        "workers": workers,
+        "wall_time": wall,
+        "ticks_per_second": sum(record["episode_ticks"] for record in records) / wall,
+        "simulated_ticks_per_second": sum(record["simulated_ticks"] for record in records) / wall,
+        "networks_per_second": networks / wall,
+        "ipc_bytes_per_task": sum(record["bytes_sent"] + record["bytes_received"] for record in records) / networks,
+        "idle_time": idle,
+        "idle_fraction": idle / (workers * wall),
+        "generations": records,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="scaling of the headless training with the number of workers")
+    default_workers = ",".join(str(2 ** i) for i in range(os.cpu_count().bit_length()))
+    parser.add_argument("--workers", default=default_workers,
+                        help="numbers of worker processes (default: powers of two up to the number of cpus)")
+    parser.add_argument("--generations", type=int, default=3, help="generations per run")
+    parser.add_argument("--mode", choices=("plain", "reuse", "halving"), default="plain",
+                        help="evaluation of a generation: whole worlds (plain), trajectory reuse or successive "
+                             "halving")
+    parser.add_argument("--output", default="scaling.json", help="the JSON report")
+    args = parser.parse_args()
+
+    runs = []
+    for workers in sorted(int(n) for n in args.workers.split(",")):
+        print("running with {} workers".format(workers), flush=True)
+        runs.append(run(workers, args.generations, args.mode))
+
+    reference = runs[0]
+    for result in runs:
+        result["speedup"] = result["ticks_per_second"] / reference["ticks_per_second"]
+        result["efficiency"] = result["speedup"] * reference["workers"] / result["workers"]
+        print("{:>4} workers: {:>9.0f} ticks/s  efficiency {:>6.1%}  {:>8.0f} bytes/task  idle {:>5.1%}".format(
+            result["workers"], result["ticks_per_second"], result["efficiency"], result["ipc_bytes_per_task"],
+            result["idle_fraction"]))
+
+    write_json(args.output, {"machine": machine_info(), "mode": args.mode, "generations": args.generations,
+                             "runs": runs})
+
+
+if __name__ == '__main__':
+    main()
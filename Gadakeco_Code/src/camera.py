@@ -18,9 +18,14 @@ class Camera:
         self._x = x
         self._y = y
 
+    def getDestination(self):
+        """
+        the position the camera is moving towards
+        """
+        return (self._player.getMidX() - screenWidth * cameraPosX, self._player.getMidY() - screenHeight * cameraPosY)
+
     def update(self, sElapsed):
-        destX = self._player.getMidX() - screenWidth * cameraPosX
-        destY = self._player.getMidY() - screenHeight * cameraPosY
+        destX, destY = self.getDestination()
         # TODO: maybe better following algorithm
         self._x += (destX - self._x) * 4 * sElapsed
         self._y += (destY - self._y) * 4 * sElapsed
@@ -10,10 +10,17 @@ class BaseContext():
     the base class for all ContextManagers
     """
 
+    # whether the context changes every frame (e.g. a running world), it's always drawn completely then
+    animated = False
+
     def __init__(self, setContextFunc):
         self._setContextFunc = setContextFunc
         self._elements = {}
         self._wasMouseDown = False
+        # whether the next frame has to be drawn completely
+        self._redrawAll = True
+        # the draw state and rect of each element when it was drawn last
+        self._drawn = {}
 
     def addElement(self, name, element):
         self._elements[name] = element
@@ -36,6 +43,48 @@ class BaseContext():
         for element in self._elements.values():
             element.draw(screen)
 
+    def redraw(self):
+        # the next frame is drawn completely (e.g. after the context was switched to)
+        self._redrawAll = True
+
+    def drawDirty(self, screen):
+        """
+        draws the parts of the screen that changed since the last frame and returns their rects
+        (for pygame.display.update)
+        """
+        drawn = {element: (element.getDrawState(), element.getRect()) for element in self._elements.values()}
+
+        if self.animated or self._redrawAll:
+            self._redrawAll = False
+            self._drawn = drawn
+            screen.set_clip()
+            screen.fill((0, 0, 0))
+            self.draw(screen)
+            return [screen.get_rect()]
+
+        # the old and the new area of changed elements and the area of removed ones
+        rects = []
+        for element, (state, rect) in drawn.items():
+            old = self._drawn.get(element)
+            if old is None:
+                rects.append(rect)
+            elif old[0] != state:
+                rects.append(rect.union(old[1]))
+        rects += [rect for element, (_, rect) in self._drawn.items() if element not in drawn]
+        self._drawn = drawn
+
+        # everything in the rects is drawn again, the rest of the screen is kept
+        for rect in rects:
+            screen.set_clip(rect)
+            screen.fill((0, 0, 0))
+            self.draw(screen)
+        screen.set_clip()
+        return rects
+
+    def close(self):
+        # called when the context is left for good (e.g. back to the main menu)
+        pass
+
     def closeApp(self):
         pygame.quit()
         sys.exit()
@@ -44,6 +93,8 @@ class BaseContext():
         if event.type == pygame.QUIT:
             self.closeApp()
             return True
+        if event.type == pygame.VIDEOEXPOSE:
+            self.redraw()
 
         for element in self._elements.values():
             if element.canHandleEvent(event) and element.handleEvent(event):
@@ -11,6 +11,8 @@ class GameContext(BaseContext):
     ContextManager for the game itself
     """
 
+    animated = True
+
     def __init__(self, seed, setContextFunc):
         BaseContext.__init__(self, setContextFunc)
         self.setWorld(World(seed))
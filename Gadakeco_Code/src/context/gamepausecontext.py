@@ -51,4 +51,5 @@ class GamePauseContext(BaseContext):
 
     def buttonMainMenu(self):
         from context.mainmenucontext import MainMenuContext
+        self._gameContext.close()
         self._setContextFunc(MainMenuContext(self._setContextFunc))
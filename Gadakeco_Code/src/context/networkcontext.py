@@ -39,10 +39,13 @@ class NetworkContext(BaseContext):
             "lCaption": GuiLabel.createCentered(10, Font(None, 60), "Neuronal Networking"),
             "lNetworks": GuiLabel(100, 70, fontObj, "Your Networks:"),
             "cNetworks": GuiContainer(100, 110, 350, 450, fontObj),
-            "lSeed": GuiLabel(525, 220, fontObj, "Seed for the World Generator"),
-            "tfSeed": GuiNumberTextfield(610, 260, SysFont("Monospace", 38, bold=True), width=220),
-            "lHint": GuiLabel(520, 330, fontObj, "leave blank for a random seed", color=(200, 200, 200)),
-            "bCreateNetwork": GuiButton(570, 380, fontObj, "Create New Network", width=300).connect(
+            "lSeed": GuiLabel(525, 140, fontObj, "Seed for the World Generator"),
+            "tfSeed": GuiNumberTextfield(610, 180, SysFont("Monospace", 38, bold=True), width=220),
+            "lHint": GuiLabel(520, 250, fontObj, "leave blank for a random seed", color=(200, 200, 200)),
+            "lDecisionInterval": GuiLabel(545, 310, fontObj, "Physic Updates per Decision"),
+            "tfDecisionInterval": GuiNumberTextfield(610, 350, SysFont("Monospace", 38, bold=True), width=220,
+                                                     text="1"),
+            "bCreateNetwork": GuiButton(570, 440, fontObj, "Create New Network", width=300).connect(
                 self.buttonCreateNetwork),
             "bBack": GuiButton(240, 600, fontObj, "Back").connect(self.buttonBack)
         })
@@ -71,6 +74,10 @@ class NetworkContext(BaseContext):
             seed = int(seed)
         return seed
 
+    def getDecisionInterval(self):
+        decisionInterval = self._elements['tfDecisionInterval'].getText()
+        return max(int(decisionInterval), 1) if decisionInterval else 1
+
     def draw(self, screen):
         screen.blit(self._background, (0, 0))
         BaseContext.draw(self, screen)
@@ -86,7 +93,8 @@ class NetworkContext(BaseContext):
     def buttonCreateNetwork(self):
         from context.networktrainingcontext import NNTraningContext
         Music.stop()
-        self._setContextFunc(NNTraningContext(self.getSeed(), self._setContextFunc))
+        self._setContextFunc(NNTraningContext(self.getSeed(), self._setContextFunc,
+                                              decisionInterval=self.getDecisionInterval()))
 
     def buttonBack(self):
         self._setContextFunc(self._mainMenuContext)
@@ -1,3 +1,4 @@
+import itertools
 import os
 import random
 
@@ -7,6 +8,7 @@ from pygame.font import Font, SysFont
 from context.basecontext import BaseContext
 from gui.guibutton import GuiButton
 from gui.guilabel import GuiLabel
+from gui.guitable import CategoryData, GuiTable
 from gui.guitextfield import GuiNumberTextfield
 from lib import constants
 from neat.population import Population
@@ -14,9 +16,14 @@ from util import texturehandler
 from util.soundhandler import Music
 
 
+# number of networks that are added to the leaderboard per update
+leaderboardChunk = 500
+
+
 class NetworkEditContext(BaseContext):
     """
     context for viewing/editing a saved neuronal network
+    the leaderboard of the networks is filled over several frames, so large populations don't block the context
     """
 
     def __init__(self, networkContext, setContextFunc, popFileName):
@@ -44,12 +51,43 @@ class NetworkEditContext(BaseContext):
             "bShowResult": GuiButton(240, 530, fontObj, "Show Result", width=285).connect(self.buttonShowResult),
             "bResumeTraining": GuiButton(555, 530, fontObj, "Resume Training", width=285).connect(
                 self.buttonResumeTraining),
-            "bBack": GuiButton(240, 600, fontObj, "Back").connect(self.buttonBack)
+            "bBack": GuiButton(240, 600, fontObj, "Back").connect(self.buttonBack),
+            "tLeaderboard": self.createLeaderboard(140, 250, 800, 205)
         })
+        # the networks that aren't in the leaderboard yet
+        self._pendingNetworks = iter(self._pop.current_generation)
 
         # enable key repeats
         pygame.key.set_repeat(500, 50)
 
+    def createLeaderboard(self, x, y, width, height):
+        fontObj = Font(None, 28)
+        categoryData = CategoryData(fontObj, "Fitness", "Hidden nodes", "Edges", "Network", "Parent")
+        categoryData.setWeight("Fitness", 1.5)
+        categoryData.setFormatString("Fitness", "{0:.2f}")
+        for category in ("Fitness", "Hidden nodes", "Edges"):
+            categoryData.setDefaultSortDir(category, True)
+        for category in ("Fitness", "Hidden nodes", "Edges", "Network", "Parent"):
+            categoryData.setAlignment(category, "r")
+        # ids are unknown for networks of old populations and the first generation has no parents
+        for category in ("Network", "Parent"):
+            categoryData.setSortKey(category, lambda value: value if isinstance(value, int) else 0)
+        return GuiTable(x, y, width, height, fontObj, categoryData)
+
+    def leaderboardRow(self, network):
+        return (network.fitness, len(network.get_nodes()) - 489, len(network.get_edges()),
+                "-" if network.network_id is None else network.network_id,
+                "-" if network.parent_id is None else network.parent_id)
+
+    def update(self, sElapsed):
+        BaseContext.update(self, sElapsed)
+
+        networks = list(itertools.islice(self._pendingNetworks, leaderboardChunk))
+        if networks:
+            table = self._elements["tLeaderboard"]
+            table.addRows([self.leaderboardRow(network) for network in networks])
+            table.sortRows()
+
     def draw(self, screen):
         screen.blit(self._background, (0, 0))
         BaseContext.draw(self, screen)
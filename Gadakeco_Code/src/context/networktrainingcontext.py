@@ -1,44 +1,91 @@
+import queue
+import time
+
 import pygame
-from pygame.font import SysFont
 
+import util.fonthandler as fonthandler
 import util.texturehandler as texhandler
 from context.basecontext import BaseContext
 from gui.guibutton import GuiButton
 from lib import constants
+from lib.config import Entries
+from lib.constants import FPS
 from neat import networkrenderer
 from neat.population import Population
 from render.renderworld import RenderNeuronalWorld
+from render.renderworldview import WorldView
+from training.background import BackgroundTrainer
+from training.memory import MemoryTracker, format_report, surface_bytes
+from training.telemetry import TelemetryWriter, create_record
 from world import NeuronalWorld
 
 
 class NNTraningContext(BaseContext):
     """
     Context for training neuronal networks
+    in turbo mode (toggled with T while training) as many physic updates as fit into 'turboBudget' seconds are done per
+    frame, or exactly 'turboTicks' if given, and only the latest state is drawn
+    with the "Background training" option the generations are evaluated on a process pool (see training.background),
+    only the best networks of the last generation are shown by the snapshots they send
+    the worlds are simulated headless, renderers are only attached to the worlds that are shown in the current draw
+    mode (see 'updateRenderers')
     """
 
-    def __init__(self, seed, setContextFunc, population=None, train=True):
+    animated = True
+
+    def __init__(self, seed, setContextFunc, population=None, train=True, decisionInterval=1, turboBudget=0.8 / FPS,
+                 turboTicks=None):
         BaseContext.__init__(self, setContextFunc)
         self.seed = seed
-        self.pop = Population(seed, 100) if population is None else population
-        if train:
+        # (the decision interval is stored with the population, 'decisionInterval' is only used for a new one)
+        self.pop = Population(seed, 100, decisionInterval) if population is None else population
+        self._trainer = None
+        if train and Entries.BackgroundTraining.getCurrentValue():
+            # the views are created for each generation of the trainer
+            self.worlds = []
+            self._viewGeneration = None
+        elif train:
             self.worlds = []
             for net in sorted(self.pop.current_generation, key=lambda x: x.fitness, reverse=True):
-                nWorld = NeuronalWorld(self.pop.seed, net)
-                nWorld.renderer = RenderNeuronalWorld(nWorld)
+                nWorld = self.createWorld(net)
                 self.worlds.append(nWorld)
                 nWorld.generatePlatform()
         else:
             best_nn = max((n for n in self.pop.current_generation), key=lambda x: x.fitness)
-            nWorld = NeuronalWorld(self.pop.seed, best_nn)
-            nWorld.renderer = RenderNeuronalWorld(nWorld)
-            self.worlds = [nWorld]
+            self.worlds = [self.createWorld(best_nn)]
         self.drawmode = 0
         self._train = train
+        self.turbo = False
+        self.turboBudget = turboBudget
+        self.turboTicks = turboTicks
+        # physic updates of the last frame (shown in turbo mode)
+        self._lastTicks = 0
+        # the thumbnails of the overview by the id of their world: (world, surface, time of the drawn state)
+        self._thumbnails = {}
+        self._networkSurface = None
+        # memory report at the end of each generation (only while training with the "Memory report" option)
+        self._memoryTracker = None
+        self._telemetry = None
+        if train and Entries.MemoryReport.getCurrentValue():
+            self._memoryTracker = MemoryTracker()
+            self._telemetry = TelemetryWriter(constants.res_loc("networks") + self.pop.name + "-telemetry.jsonl")
+        self._generationStart = time.perf_counter()
+        # the records of the generations the background training finished, they are reported by the main thread (the
+        # memory report reads the worlds of the gui)
+        self._finishedGenerations = queue.Queue()
+        if train and Entries.BackgroundTraining.getCurrentValue():
+            onGeneration = None
+            if self._memoryTracker is not None:
+                # (the record is created in the training thread, before it creates the next generation)
+                onGeneration = lambda pop, evaluationTime: self._finishedGenerations.put(
+                    create_record(pop, evaluationTime))
+            self._trainer = BackgroundTrainer(self.pop, on_generation=onGeneration).start()
 
         # the gui overlays
         self._overlays = texhandler.adjustedSurface(texhandler.Textures.overlays, height=48)
 
-        fontObj = SysFont("Monospace", 30, bold=True)
+        fontObj = fonthandler.getFont("Monospace", 30, bold=True)
+        self._turboFont = fonthandler.getFont("Monospace", 20, bold=True)
         # mode switch buttons
         self.addElements({
             "bNext": GuiButton(constants.screenWidth - 100, constants.screenHeight - 70, fontObj, "->",
@@ -48,7 +95,7 @@ class NNTraningContext(BaseContext):
         })
 
     def calculateDelta(self, clock):
-        if self._train:
+        if self._train and self._trainer is None:
             return constants.UPS
         else:
             return BaseContext.calculateDelta(self, clock)
@@ -56,6 +103,29 @@ class NNTraningContext(BaseContext):
     def update(self, t):
         BaseContext.update(self, t)
 
+        if self._trainer is not None:
+            self.updateViews()
+            while not self._finishedGenerations.empty():
+                self.reportMemory(self._finishedGenerations.get())
+        elif not self.turbo:
+            self.updateWorlds()
+            self._lastTicks = 1
+        elif self.turboTicks is not None:
+            for _ in range(self.turboTicks):
+                self.updateWorlds()
+            self._lastTicks = self.turboTicks
+        else:
+            # at least one physic update, even if drawing takes longer than a frame
+            deadline = time.perf_counter() + self.turboBudget
+            self._lastTicks = 0
+            while self._lastTicks == 0 or time.perf_counter() < deadline:
+                self.updateWorlds()
+                self._lastTicks += 1
+
+    def updateWorlds(self):
+        """
+        one physic update of all worlds, starts the next generation when all of them are done
+        """
         done = True
         for world in self.worlds:
             if world.update(constants.UPS):
@@ -63,25 +133,94 @@ class NNTraningContext(BaseContext):
 
         if done and self._train:
             self.pop.save_to_file(constants.res_loc("networks") + self.pop.name + ".pop")
+            if self._memoryTracker is not None:
+                self.reportMemory(create_record(self.pop, time.perf_counter() - self._generationStart))
             self.pop.create_next_generation()
             self.pop.generation_count += 1
 
             self.worlds = []
             for net in self.pop.current_generation:
-                nWorld = NeuronalWorld(self.pop.seed, net)
-                nWorld.renderer = RenderNeuronalWorld(nWorld)
+                nWorld = self.createWorld(net)
                 self.worlds.append(nWorld)
                 nWorld.generatePlatform()
+            self._generationStart = time.perf_counter()
+
+    def updateViews(self):
+        """
+        applies the snapshots of the background training to the views of the shown networks
+        """
+        generation, networks = self._trainer.displayed
+        if generation != self._viewGeneration:
+            self.worlds = [WorldView(self.pop.seed, net) for net in networks]
+            self._viewGeneration = generation
+        for slot, snapshotGeneration, snapshot in self._trainer.poll():
+            if snapshotGeneration == self._viewGeneration:
+                self.worlds[slot].apply(snapshot)
+
+    def close(self):
+        if self._trainer is not None:
+            self._trainer.stop()
+
+    def reportMemory(self, record):
+        """
+        adds the memory report to the record of the finished generation and writes it into the telemetry file of the
+        population
+        """
+        renderers = [world.renderer for world in self.worlds if hasattr(world, "renderer")]
+        for world in self.worlds:
+            renderers += [ent.renderer for ent in [world.player] + world.staticEntities + world.dynamicEntities
+                          if hasattr(ent, "renderer")]
+        memory = self._memoryTracker.report({
+            "surface_bytes": surface_bytes(renderers),
+            "static_entities": sum(len(world.staticEntities) for world in self.worlds),
+        })
+        print(format_report(memory))
+        record["memory"] = memory
+        self._telemetry.write(record)
+
+    def createWorld(self, net):
+        return NeuronalWorld(self.pop.seed, net, decisionInterval=self.pop.decision_interval)
+
+    def displayedWorlds(self):
+        """
+        the worlds that are drawn in the current draw mode
+        """
+        if self.drawmode == 2 or not self.worlds:
+            return []
+        if self.drawmode == 3 and len(self.worlds) >= 9:
+            return sorted(self.worlds, key=lambda x: -x.nn.fitness)[:9]
+        return self.worlds[:1]
+
+    def updateRenderers(self):
+        """
+        attaches renderers to the displayed worlds and detaches them from the others
+        (the views of the background training always have theirs)
+        """
+        if self._trainer is not None:
+            return
+        displayed = self.displayedWorlds()
+        for world in self.worlds:
+            if world in displayed:
+                if not hasattr(world, "renderer"):
+                    world.renderer = RenderNeuronalWorld(world)
+            elif hasattr(world, "renderer"):
+                world.renderer.detach()
 
     def draw(self, screen):
+        self.updateRenderers()
         if self.worlds:
             [self.drawSimple, self.drawNetwork, self.drawSummary, self.drawOverview][self.drawmode](screen)
         BaseContext.draw(self, screen)
         # draw current generation
-        renderedGen = SysFont("Monospace", 40, bold=True).render(str(self.pop.generation_count), 1, (50, 50, 50))
+        renderedGen = fonthandler.renderText(fonthandler.getFont("Monospace", 40, bold=True),
+                                             str(self.pop.generation_count), (50, 50, 50))
         # draw generation overlay (dinosaur egg)
         screen.blit(self._overlays, (485, 650), (336, 0, 48, 48))
         screen.blit(renderedGen, (540, 655))
+        if self.turbo:
+            renderedTurbo = fonthandler.renderText(self._turboFont, "Turbo: {} ticks/frame".format(self._lastTicks),
+                                                   (200, 50, 50))
+            screen.blit(renderedTurbo, (640, 665))
 
     def drawSimple(self, screen):
         """
@@ -98,11 +237,13 @@ class NNTraningContext(BaseContext):
         world = self.worlds[0]
         world.renderer.render(screen)
 
-        networkSurface = pygame.Surface((750, 180)).convert_alpha()
-        networkSurface.fill((0, 0, 0, 0))
+        # (the surface is reused, the graph of the network is cached by the network renderer)
+        if self._networkSurface is None:
+            self._networkSurface = pygame.Surface((750, 180)).convert_alpha()
+        self._networkSurface.fill((0, 0, 0, 0))
         # draw the minimap and network
-        networkrenderer.render_network(networkSurface, world.nn, world.minimapValues)
-        screen.blit(networkSurface, (10, 60))
+        networkrenderer.render_network(self._networkSurface, world.nn, world.minimapValues)
+        screen.blit(self._networkSurface, (10, 60))
 
     def drawSummary(self, screen):
         """
@@ -110,14 +251,15 @@ class NNTraningContext(BaseContext):
         """
         x = 30
         y = 50
-        fontObj = SysFont("Monospace", 18, bold=True)
+        fontObj = fonthandler.getFont("Monospace", 18, bold=True)
 
         time = 0
         rowHeight = fontObj.get_height() + 2
 
         for world in self.worlds:
             time = max(time, world.time)
-            renderedFitness = fontObj.render("Fitness: {0:.2f}".format(world.nn.fitness), 1, (255, 255, 255))
+            renderedFitness = fonthandler.renderText(fontObj, "Fitness: {0:.2f}".format(world.nn.fitness),
+                                                     (255, 255, 255))
 
             if (y + rowHeight > (constants.screenHeight - 95)):
                 y = 50
@@ -136,25 +278,38 @@ class NNTraningContext(BaseContext):
             y += rowHeight
 
         # draw the time
-        renderedTime = pygame.font.SysFont("Monospace", 34, bold=True).render("Time: {0:.2f}".format(time), 1,
-                                                                              (255, 255, 255))
+        renderedTime = fonthandler.renderText(fonthandler.getFont("Monospace", 34, bold=True),
+                                              "Time: {0:.2f}".format(time), (255, 255, 255))
         screen.blit(renderedTime, ((constants.screenWidth - renderedTime.get_width()) // 2, 10))
 
     def drawOverview(self, screen):
         """
         draws the best 9 networks
+        (as thumbnails, which are only redrawn if their world changed)
         """
         if len(self.worlds) >= 9:
             partWidth = constants.screenWidth // 3
             partHeight = constants.screenHeight // 3
-            bestWords = sorted(self.worlds, key=lambda x: -x.nn.fitness)[:9]
-            for y in range(0, 3):
-                for x in range(0, 3):
-                    surface = pygame.Surface(constants.screenSize)
-                    bestWords[3 * y + x].renderer.render(surface)
-                    surface = pygame.transform.scale(surface, (partWidth, partHeight))
-                    screen.blit(surface, (partWidth * x, partHeight * y))
-                    pygame.draw.rect(screen, (0, 0, 0), (partWidth * x, partHeight * y, partWidth, partHeight), 1)
+            bestWords = self.displayedWorlds()
+            # the surfaces of worlds that aren't shown anymore are reused
+            shown = {id(world) for world in bestWords}
+            unused = [surface for key, (_, surface, _) in self._thumbnails.items() if key not in shown]
+            thumbnails = {}
+            for i, world in enumerate(bestWords):
+                thumbnail = self._thumbnails.get(id(world))
+                if thumbnail is None or thumbnail[0] is not world:
+                    surface = unused.pop() if unused else pygame.Surface((partWidth, partHeight)).convert()
+                    thumbnail = (world, surface, None)
+                surface = thumbnail[1]
+                if thumbnail[2] != world.time:
+                    world.renderer.renderThumbnail(surface)
+                thumbnails[id(world)] = (world, surface, world.time)
+
+                x = partWidth * (i % 3)
+                y = partHeight * (i // 3)
+                screen.blit(surface, (x, y))
+                pygame.draw.rect(screen, (0, 0, 0), (x, y, partWidth, partHeight), 1)
+            self._thumbnails = thumbnails
         else:
             self.drawSimple(screen)
 
@@ -168,6 +323,8 @@ class NNTraningContext(BaseContext):
                 self._setContextFunc(GamePauseContext(self, self._setContextFunc))
             elif event.key == pygame.K_TAB:
                 self.drawmode = (self.drawmode + 1) % 4
+            elif event.key == pygame.K_t and self._train and self._trainer is None:
+                self.turbo = not self.turbo
         return False
 
     """
@@ -31,6 +31,9 @@ class GuiButton(GuiElement):
     def getText(self):
         return self._text
 
+    def getDrawState(self):
+        return GuiElement.getDrawState(self) + (self._hovered, self.enabled, self._text)
+
     def createSurface(self, startColor, endColor):
         self._surface = pygame.surface.Surface((self.getWidth(), self.getHeight()))
         for y in range(self.getHeight()):
@@ -30,6 +30,10 @@ class GuiContainer(GuiElement):
     def __getitem__(self, key):
         return self._elements[key][0]
 
+    def getDrawState(self):
+        return GuiElement.getDrawState(self) + (self._scrollBar.getDrawState(),) + tuple(
+            element.getDrawState() for element, _, _ in self._elements.values())
+
     def update(self, t):
         self._scrollBar.update(t)
         for element in self._elements.values():
@@ -67,7 +71,9 @@ class GuiContainer(GuiElement):
             element.setY(self.getY() + relY - self._scrollBar.getValue() * scrollHeight)
 
     def draw(self, screen):
-        screen.set_clip(self.getRect())
+        # (the clip of the screen is kept, e.g. when only parts of it are redrawn)
+        clip = screen.get_clip()
+        screen.set_clip(self.getRect().clip(clip))
         screen.fill((70, 70, 70))
 
         self._scrollBar.draw(screen)
@@ -75,4 +81,4 @@ class GuiContainer(GuiElement):
             if self._aabb.intersects(element[0]._aabb):
                 element[0].draw(screen)
 
-        screen.set_clip()
+        screen.set_clip(clip)
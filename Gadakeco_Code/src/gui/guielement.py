@@ -44,6 +44,10 @@ class GuiElement(metaclass=ABCMeta):
     def handleEvent(self, event):
         return False
 
+    def getDrawState(self):
+        # everything the drawing depends on, the element is only redrawn if it changes (see BaseContext.drawDirty)
+        return (self._aabb.x, self._aabb.y, self._aabb.width, self._aabb.height)
+
     @abstractmethod
     def update(self, t):
         pass
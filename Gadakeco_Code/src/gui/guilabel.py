@@ -21,6 +21,9 @@ class GuiLabel(GuiElement):
     def update(self, t):
         pass
 
+    def getDrawState(self):
+        return GuiElement.getDrawState(self) + (self._textSurf,)
+
     def draw(self, screen):
         screen.blit(self._textSurf, (self.getX(), self.getY()))
 
@@ -34,6 +34,9 @@ class GuiScrollbar(GuiElement):
     def update(self, t):
         pass
 
+    def getDrawState(self):
+        return GuiElement.getDrawState(self) + (self._value,)
+
     def canHandleEvent(self, event):
         return GuiElement.canHandleEvent(self, event)
 
@@ -1,8 +1,15 @@
+from collections import OrderedDict
+
 import pygame
 
 from gui import guiscrollbar
 from gui.guielement import GuiElement
 
+# number of rows whose rendered cells are kept by a table
+cachedRows = 256
+# number of rows that are scrolled with the mouse wheel
+scrollRows = 3
+
 
 class CategoryData():
     def __init__(self, fontObj, *categories):
@@ -13,6 +20,7 @@ class CategoryData():
         self._sortReverse = [False] * len(self._categories)
         self._formatStrings = ["{}"] * len(self._categories)
         self._alignment = ["l"] * len(self._categories)
+        self._sortKeys = [None] * len(self._categories)
 
     def getCategories(self):
         return self._categories
@@ -40,7 +48,7 @@ class CategoryData():
 
     def setFormatString(self, category, formatStr):
         if type(category) == int:
-            self._sortReverse[category] = formatStr
+            self._formatStrings[category] = formatStr
         else:
             self._formatStrings[self._categoryMap[category]] = formatStr
 
@@ -56,6 +64,16 @@ class CategoryData():
     def getAlignment(self, index):
         return self._alignment[index]
 
+    def setSortKey(self, category, key):
+        # function that maps the values of the category to the values they are sorted by (e.g. for values of mixed type)
+        if type(category) == int:
+            self._sortKeys[category] = key
+        else:
+            self._sortKeys[self._categoryMap[category]] = key
+
+    def getSortKey(self, index):
+        return self._sortKeys[index]
+
     def __len__(self):
         return len(self._categories)
 
@@ -63,12 +81,20 @@ class CategoryData():
 class GuiTable(GuiElement):
     """
     a gui table class
+    only the visible rows are drawn, their rendered cells are kept until the rows change, so it also works for
+    thousands of rows
     """
 
     def __init__(self, x, y, width, height, fontObj, categoryData):
         GuiElement.__init__(self, x, y, width, height, fontObj)
         self._categoryData = categoryData
+        # the rows in the order they were added and the indices of the rows in the order they are shown
         self._rows = []
+        self._order = []
+        # the values to sort by of each column (lists in the order of the rows, created when first sorted by)
+        self._sortKeys = {}
+        # the rendered cells of the recently drawn rows by their index
+        self._cells = OrderedDict()
         self._spacing = 5
         self._scrollBar = guiscrollbar.GuiScrollbar(x + width - 30, y, 30, height, fontObj,
                                                     orientation=guiscrollbar.VERTICAL)
@@ -79,22 +105,73 @@ class GuiTable(GuiElement):
 
         self._sortIndex = 0
         self._sortReverse = False
+        # counts the changes of the rows
+        self._version = 0
 
     def addRow(self, *row):
-        if len(row) == len(self._categoryData):
-            self._rows.append(row)
-        else:
-            print("row length does not match number of columns, input: ", row)
+        self.addRows([row])
+
+    def addRows(self, rows):
+        # (the new rows are shown after the others, see sortRows)
+        for row in rows:
+            if len(row) == len(self._categoryData):
+                self._order.append(len(self._rows))
+                self._rows.append(tuple(row))
+            else:
+                print("row length does not match number of columns, input: ", row)
+        self._version += 1
 
     def clear(self):
         self._rows.clear()
+        self._order.clear()
+        self._sortKeys.clear()
+        self._cells.clear()
+        self._version += 1
+
+    def getRowCount(self):
+        return len(self._rows)
 
     def setSortIndex(self, index):
         self._sortIndex = index
 
     def sortRows(self):
         sortReverse = self._categoryData.getDefaultSortDir(self._sortIndex) ^ self._sortReverse
-        self._rows.sort(key=lambda row: row[self._sortIndex], reverse=sortReverse)
+        self._order.sort(key=self.getSortKeys(self._sortIndex).__getitem__, reverse=sortReverse)
+        self._version += 1
+
+    def getSortKeys(self, index):
+        # the values to sort the column by, only the ones of rows that were added since the last call are computed
+        keys = self._sortKeys.setdefault(index, [])
+        if len(keys) < len(self._rows):
+            key = self._categoryData.getSortKey(index)
+            values = (row[index] for row in self._rows[len(keys):])
+            keys.extend(values if key is None else map(key, values))
+        return keys
+
+    def getRowHeight(self):
+        return self._fontObj.get_height() + self._spacing
+
+    def getScrollHeight(self):
+        # the height of the rows that don't fit into the table
+        return max(self.getRowHeight() * (1 + len(self._rows)) - self.getHeight(), 0)
+
+    def getCells(self, index):
+        # the rendered cells of the row, they are kept for the 'cachedRows' recently drawn rows
+        cells = self._cells.get(index)
+        if cells is not None:
+            self._cells.move_to_end(index)
+            return cells
+
+        cells = [self._fontObj.render(self._categoryData.getFormatString(col).format(cell), 1, (255, 255, 255))
+                 for col, cell in enumerate(self._rows[index])]
+        self._cells[index] = cells
+        if len(self._cells) > cachedRows:
+            self._cells.popitem(last=False)
+        return cells
+
+    def getDrawState(self):
+        return GuiElement.getDrawState(self) + (self._version, self._sortIndex, self._sortReverse,
+                                                self._scrollBar.getDrawState())
 
     def update(self, t):
         self._scrollBar.update(t)
@@ -103,8 +180,8 @@ class GuiTable(GuiElement):
         # scrolling with mouse wheel
         if event.type == pygame.MOUSEBUTTONDOWN:
             if self._aabb.contains(*event.pos) and (event.button == 4 or event.button == 5):
-                scrollAmount = self.getHeight() / ((self._fontObj.get_height() + self._spacing) * (1 + len(self._rows)))
-                scrollAmount = scrollAmount * scrollAmount
+                # (a few rows at a time, however many rows there are)
+                scrollAmount = min(scrollRows * self.getRowHeight() / max(self.getScrollHeight(), 1), 1)
                 if event.button == 4:
                     scrollAmount *= -1
 
@@ -158,21 +235,25 @@ class GuiTable(GuiElement):
         pygame.draw.line(screen, (0, 0, 0), (self.getX(), y),
                          (self.getX() + self.getWidth() - self._scrollBar.getWidth(), y), 2)
 
-        # draw entries
-        screen.set_clip(self._clipRect)
-        scrollHeight = max(((self._fontObj.get_height() + self._spacing) * (1 + len(self._rows))) - self.getHeight(), 0)
-
-        y = 2 + self._categoryData.fontObj.get_height() + self._spacing - scrollHeight * self._scrollBar.getValue()
-        for row in self._rows:
+        # draw entries (the clip of the screen is kept, e.g. when only parts of it are redrawn)
+        clip = screen.get_clip()
+        screen.set_clip(self._clipRect.clip(clip))
+        rowHeight = self.getRowHeight()
+        columnWidths = [self._categoryData.getWeightedWidth(col, self.getWidth() - self._scrollBar.getWidth())
+                        for col in range(len(self._categoryData))]
+
+        y = 2 + self._categoryData.fontObj.get_height() + self._spacing
+        y -= self.getScrollHeight() * self._scrollBar.getValue()
+        # skip the rows above the table
+        first = max(int(-y // rowHeight) + 1, 0)
+        y += first * rowHeight
+        for index in self._order[first:]:
             if y > self.getHeight():
                 break
             if y > 0:
                 x = self.getX()
-                for col, cell in enumerate(row):
-                    columnWidth = self._categoryData.getWeightedWidth(col, self.getWidth() - self._scrollBar.getWidth())
-                    valueStr = self._categoryData.getFormatString(col).format(cell)
-                    renderedCell = self._fontObj.render(valueStr, 1, (255, 255, 255))
-
+                for col, renderedCell in enumerate(self.getCells(index)):
+                    columnWidth = columnWidths[col]
                     alignment = self._categoryData.getAlignment(col)
                     if alignment == "r":
                         screen.blit(renderedCell,
@@ -187,8 +268,8 @@ class GuiTable(GuiElement):
             # draw horizontal lines
             pygame.draw.line(screen, (50, 50, 50), (self.getX(), self.getY() + y - self._spacing / 2.0), (
             self.getX() + self.getWidth() - self._scrollBar.getWidth(), self.getY() + y - self._spacing / 2.0), 1)
-            y += self._fontObj.get_height() + self._spacing
+            y += rowHeight
 
-        screen.set_clip()
+        screen.set_clip(clip)
 
         self._scrollBar.draw(screen)
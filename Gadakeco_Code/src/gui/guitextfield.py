@@ -1,6 +1,7 @@
 import pygame
 
 from gui.guielement import GuiElement
+from util import fonthandler
 
 
 class GuiTextfield(GuiElement):
@@ -64,7 +65,7 @@ class GuiTextfield(GuiElement):
 
         cursorOffset = 4
         if self._text:
-            renderedText = self._fontObj.render(self._text, 1, (255, 255, 255))
+            renderedText = fonthandler.renderText(self._fontObj, self._text, (255, 255, 255))
             cursorOffset += renderedText.get_width()
             screen.blit(renderedText, (self.getX() + 4, self.getY() + 5))
         if self._focused and self._timer <= 1:
@@ -74,6 +75,9 @@ class GuiTextfield(GuiElement):
     def getText(self):
         return self._text
 
+    def getDrawState(self):
+        return GuiElement.getDrawState(self) + (self._text, self._focused and self._timer <= 1)
+
 
 class GuiNumberTextfield(GuiTextfield):
     def _isKeyValid(self, keyEvent):
@@ -31,6 +31,8 @@ class Entries(Enum):
     ShowDebug = ("Debug mode", False, EntryType.Toggle)
     MusicVolume = ("Music volume", 1.0, EntryType.Scroll)
     SoundVolume = ("Sound volume", 1.0, EntryType.Scroll)
+    MemoryReport = ("Memory report", False, EntryType.Toggle)
+    BackgroundTraining = ("Background training", False, EntryType.Toggle)
 
     def __init__(self, desc, default, entryType):
         self.desc = desc
@@ -37,6 +37,8 @@ def main():
     clock = pygame.time.Clock()
     # time accumulator
     accumulator = 0
+    # the context that was drawn last, a new one is drawn completely
+    drawnContext = None
 
     # game loop
     while True:
@@ -59,11 +61,13 @@ def main():
 
         # TODO: interpolate between render-states
 
-        # reset screen
-        screen.fill((0, 0, 0))
-        # drawing
-        context.draw(screen)
-        pygame.display.update()
+        # drawing (only the parts of the screen that changed are updated)
+        if context is not drawnContext:
+            context.redraw()
+            drawnContext = context
+        rects = context.drawDirty(screen)
+        if rects:
+            pygame.display.update(rects)
 
         # debug
 
@@ -1,49 +1,244 @@
+import argparse
 import multiprocessing
+import os
 import random
+import time
 from multiprocessing import Pool
 
 from lib import constants
 from neat.population import Population
+from training.distributed import AUTHKEY_VARIABLE, EvaluationCoordinator, get_authkey, parse_address
+from training import profiling
+from training.halving import SuccessiveHalvingEvaluator
+from training.islands import create_populations, run_islands
+from training import memory
+from training.memory import MemoryTracker, format_report
+from training.scheduler import EvaluationScheduler
+from training.steadystate import SteadyStateDriver
+from training.telemetry import TelemetryWriter, create_record
+from training.trajectory import TrajectoryReuseEvaluator
+from util import instrumentation
 from world import NeuronalWorld
 
 number_of_processes = min(100, max(multiprocessing.cpu_count() - 2, 1))
 pop_name = "29-06-2019_13-08-0"
+# hard cap for the number of physic updates per episode (None for no limit)
+max_episode_ticks = None
+# evaluate in stages and only simulate the most promising networks until the end (see training.halving)
+successive_halving = False
+# continue the episodes of mutated networks from the recorded episode of their parent (see training.trajectory)
+trajectory_reuse = False
+# time the phases of the simulation in the workers and report them after each generation (see util.instrumentation)
+instrumented = False
+# write the merged profile of the workers for every generation into this directory (see training.profiling)
+profile_directory = None
+# "cprofile" or "sampling" (lower overhead)
+profile_mode = "cprofile"
+# report the memory of the subsystems after each generation (see training.memory)
+track_memory = False
+# stop the training when the peak memory of a process exceeds this many bytes (None for no limit)
+memory_limit = None
 
 
 def evaluate(world):
     while world.update(constants.UPS):
         pass
-    return world.nn.fitness
+    return world.nn.fitness, world.ticks
 
 
-def main():
+def init_worker(instrument, profile):
+    # initializer of the pool processes
+    if instrument:
+        instrumentation.enable()
+    if profile is not None:
+        profiling.start(profile)
+
+
+def world_settings(pop):
+    # keyword arguments for all NeuronalWorlds of the simulation
+    return {"maxTicks": max_episode_ticks, "decisionInterval": pop.decision_interval}
+
+
+def load_population(decision_interval=1):
+    # 'decision_interval' is only used for a new population, a saved one keeps its own
     try:
-        pop = Population.load_from_file(constants.res_loc("networks") + pop_name + ".pop")
+        return Population.load_from_file(constants.res_loc("networks") + pop_name + ".pop")
     except:
         seed = random.randint(0, 1000)
-        pop = Population(seed, 100)
+        return Population(seed, 100, decision_interval)
+
+
+def main(pop, address=None, telemetry=None, authkey=None):
+    """
+    trains the population forever, either with local processes or, if 'address' is given,
+    with remote workers connecting to it with the shared secret 'authkey' (see training.distributed);
+    a record for each generation is appended to the file 'telemetry' (see training.telemetry)
+    """
+    writer = TelemetryWriter(telemetry) if telemetry else None
+    tracker = MemoryTracker(limit=memory_limit) if track_memory or memory_limit is not None else None
+    if address is None:
+        pool = Pool(number_of_processes, initializer=init_worker,
+                    initargs=(instrumented, profile_mode if profile_directory else None))
+        scheduler = EvaluationScheduler(pool, number_of_processes)
+        halving = SuccessiveHalvingEvaluator(scheduler)
+        reuse = TrajectoryReuseEvaluator(scheduler)
+    else:
+        coordinator = EvaluationCoordinator(address, authkey).start()
+        print("waiting for workers on {}:{}".format(*address))
 
-    pool = Pool(number_of_processes)
     while True:
-        worlds = []
-        for net in pop.current_generation:
-            nWorld = NeuronalWorld(pop.seed, net)
-            worlds.append(nWorld)
-            nWorld.generatePlatform()
-
-        # evaluate all neuronal worlds
-        fitnesses = pool.map(evaluate, worlds)
+        networks = pop.current_generation
+        # the episode lengths of the last generation estimate how long each evaluation takes
+        estimates = [net.episode_ticks for net in networks]
+        start = time.time()
+        simulated_ticks = None
+        cache = {}
+
+        if address is not None:
+            results = coordinator.evaluate(networks, pop.seed, world_settings(pop), estimates)
+        elif trajectory_reuse and not successive_halving:
+            results = reuse.evaluate(networks, pop.seed, world_settings(pop))
+            # (the simulated physic updates are part of the telemetry)
+            simulated_ticks = reuse.last_ticks[0]
+            reused, children = reuse.last_reused
+            cache["trajectory"] = reused / children if children else None
+        else:
+            worlds = []
+            for net in networks:
+                nWorld = NeuronalWorld(pop.seed, net, **world_settings(pop))
+                worlds.append(nWorld)
+                nWorld.generatePlatform()
+
+            # evaluate all neuronal worlds
+            if successive_halving:
+                results = halving.evaluate(worlds, pop.elite_count())
+            else:
+                results = scheduler.map(evaluate, worlds, estimates)
+        evaluation_time = time.time() - start
+
         # set the fitness (because multiprocessing)
-        for world, fit in zip(worlds, fitnesses):
-            world.nn.fitness = fit
+        for net, (fit, ticks) in zip(networks, results):
+            net.fitness = fit
+            net.episode_ticks = ticks
 
         path = constants.res_loc("networks") + pop.name + ".pop"
         pop.save_to_file(path)
         print("best fitness:", max(nn.fitness for nn in pop.current_generation))
+        timer = None
+        if address is None and instrumented:
+            timer = scheduler.collect_timer()
+            if timer is not None:
+                print(timer)
+        if address is None and profile_directory:
+            stats = scheduler.collect_profile()
+            if stats is not None:
+                os.makedirs(profile_directory, exist_ok=True)
+                stats.dump_stats(os.path.join(profile_directory, "{}-generation{}.pstats".format(
+                    pop.name, pop.generation_count)))
+        report = None
+        if tracker is not None:
+            report = tracker.report({"worker_peak_rss": scheduler.get_peak_rss() if address is None else None})
+            print(format_report(report))
+        if writer is not None:
+            if address is None:
+                utilization = scheduler.collect_busy_time() / (number_of_processes * evaluation_time)
+            else:
+                utilization = None
+            writer.write(create_record(pop, evaluation_time, simulated_ticks, utilization, cache, timer, report))
+        warning = tracker.check(report) if tracker is not None else None
+        if warning is not None:
+            # the population of this generation is saved, the training can be continued from it
+            print("stopping the training:", warning)
+            if writer is not None:
+                writer.close()
+            return
         pop.create_next_generation()
         pop.generation_count += 1
 
 
 if __name__ == '__main__':
-    print("starting simulation with {} processes".format(number_of_processes))
-    main()
+    parser = argparse.ArgumentParser(description="headless training of neuronal networks")
+    parser.add_argument("--serve", metavar="HOST:PORT",
+                        help="evaluate on remote workers (python -m training.distributed HOST:PORT) "
+                             "instead of local processes")
+    parser.add_argument("--authkey",
+                        help="--serve: shared secret of the workers (default: the environment variable {})".format(
+                            AUTHKEY_VARIABLE))
+    parser.add_argument("--islands", type=int, default=0,
+                        help="evolve this many populations in parallel processes (island model)")
+    parser.add_argument("--migration-interval", type=int, default=5,
+                        help="island model: generations between the exchange of the best networks")
+    parser.add_argument("--migrants", type=int, default=2,
+                        help="island model: number of networks sent to the next island")
+    parser.add_argument("--trajectory-reuse", action="store_true",
+                        help="continue the episodes of mutated networks from the recorded episode of their parent "
+                             "(generational training on local processes only)")
+    parser.add_argument("--steady-state", action="store_true",
+                        help="create a new network whenever an evaluation finishes instead of whole generations")
+    parser.add_argument("--decision-interval", type=int, default=1,
+                        help="query the networks of a new population every k physic updates only "
+                             "(a saved population keeps its own interval)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="report the time spent in each phase of the simulation after every generation "
+                             "(generational training on local processes only)")
+    parser.add_argument("--telemetry", metavar="PATH",
+                        help="append a record of every generation to this .jsonl or .csv file (steady-state: "
+                             "every population size of evaluations, island model: every generation of an island)")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="profile the worker processes and write a merged .pstats file per generation to DIR "
+                             "(generational training on local processes only)")
+    parser.add_argument("--profile-mode", choices=("cprofile", "sampling"), default=profile_mode,
+                        help="deterministic profiling or stack sampling with a lower overhead")
+    parser.add_argument("--memory", action="store_true",
+                        help="report the memory of genomes, worlds and renderers and the peak memory of the workers "
+                             "after every generation (slows the training down)")
+    parser.add_argument("--memory-limit", type=float, metavar="MB",
+                        help="stop the training when the peak memory of a process exceeds this limit "
+                             "(not with --steady-state or --islands)")
+    args = parser.parse_args()
+    # the option of another driver than the generational training on local processes, which is the only one that
+    # collects the phase times and profiles of its workers (with its EvaluationScheduler) and reuses trajectories
+    driver = ("--steady-state" if args.steady_state else "--islands" if args.islands else
+              "--serve" if args.serve else None)
+    if args.instrument and driver:
+        parser.error("--instrument can't be combined with " + driver)
+    if args.profile and driver:
+        parser.error("--profile can't be combined with " + driver)
+    if args.trajectory_reuse and driver:
+        parser.error("--trajectory-reuse can't be combined with " + driver)
+    # only the generational training reports the memory and checks its limit, tracing would just slow the others down
+    if (args.memory or args.memory_limit is not None) and driver in ("--steady-state", "--islands"):
+        parser.error("--memory and --memory-limit can't be combined with " + driver)
+    authkey = None
+    if args.serve:
+        # refuse to serve without a secret, the workers' messages are unpickled
+        try:
+            authkey = get_authkey(args.authkey)
+        except ValueError as error:
+            parser.error(str(error))
+    trajectory_reuse = trajectory_reuse or args.trajectory_reuse
+    instrumented = instrumented or args.instrument
+    profile_directory = profile_directory or args.profile
+    profile_mode = args.profile_mode
+    track_memory = track_memory or args.memory
+    if args.memory_limit is not None:
+        memory_limit = int(args.memory_limit * 2 ** 20)
+    if track_memory or memory_limit is not None:
+        memory.start()
+
+    pop = load_population(args.decision_interval)
+    print("decision interval: {} physic updates".format(pop.decision_interval))
+    if args.steady_state:
+        print("starting steady-state simulation with {} processes".format(number_of_processes))
+        SteadyStateDriver(Pool(number_of_processes), number_of_processes, pop, world_settings(pop),
+                          telemetry=TelemetryWriter(args.telemetry) if args.telemetry else None).run()
+    elif args.islands:
+        print("starting simulation with {} islands".format(args.islands))
+        run_islands(create_populations(args.islands, pop), world_settings(pop), args.migration_interval,
+                    args.migrants, telemetry=TelemetryWriter(args.telemetry) if args.telemetry else None)
+    elif args.serve:
+        print("starting simulation with remote workers")
+        main(pop, parse_address(args.serve), args.telemetry, authkey)
+    else:
+        print("starting simulation with {} processes".format(number_of_processes))
+        main(pop, telemetry=args.telemetry)
@@ -7,8 +7,7 @@ and the connecting edges.
 """
 
 import math
-import numpy as np
-from random import randint
+import random
 from src.neat.node import *
 
 
@@ -67,15 +66,17 @@ class Network:
 
     Methods
     -------
+        calculate_fitness(self, points, time): float
+            Given the formula the fitness for the 'points' reached after 'time' will be calculated
         update_fitness(self, points, time):
             Given the formula the fitness of the network 'self' will be updated
         evaluate(self, values): [bool, bool, bool]
             Given the 'values' representing the surroundings the next action will be determined: if the network should
             press "left", "right" or "jump".
-        edge_mutation(self):
+        edge_mutation(self, rng=random):
             Takes the network 'self', chooses two random nodes given a certain distribution and connects them with a new
             edge.
-        node_mutation(self):
+        node_mutation(self, rng=random):
             Takes the network 'self', chooses a random edge and breaks it up into two with a new node inbetween.
     """
     def __init__(self):
@@ -91,6 +92,13 @@ class Network:
         self.nodes = []
         self.edges = set()
         self.fitness = 0
+        # Number of physic updates of the last evaluation; passed on to the offspring as an estimate of its cost.
+        self.episode_ticks = 0
+        # Identifiers of the network and the network it was mutated from, assigned by 'Population'.
+        self.network_id = None
+        self.parent_id = None
+        # Counts the changes of the nodes and edges, so drawings of the graph can be cached (see 'networkrenderer').
+        self.version = 0
 
         # Create input nodes for the 27x18=486 pixels.
         for x in range(486):
@@ -100,9 +108,18 @@ class Network:
         for x in range(3):
             self.nodes.append(OutputNode())
 
+    def __setstate__(self, state):
+        # Networks pickled by older versions lack some attributes, so start with their defaults.
+        self.__dict__.update(episode_ticks=0, network_id=None, parent_id=None, version=0)
+        self.__dict__.update(state)
+
+    def calculate_fitness(self, points, time):
+        # Calculates the fitness value a network would have given the players points and the time gone by.
+        return points - (50 * time)
+
     def update_fitness(self, points, time):
         # Calculate and updates the networks fitness value based on the players points and the time gone by.
-        self.fitness = points - (50 * time)
+        self.fitness = self.calculate_fitness(points, time)
 
     def evaluate(self, values):
         """
@@ -143,7 +160,7 @@ class Network:
 
         return [left, right, jump]
 
-    def edge_mutation(self):
+    def edge_mutation(self, rng=random):
         """
         Function to mutate the given network 'self' by adding a new edge.
         Therefore one node will be chosen to be the beginning: proportional to the number of both input and hidden nodes
@@ -153,25 +170,32 @@ class Network:
         The weight of the edge will be random either 1 or -1.
         The resulting edge must be both valid and non-existing in the network.
         Now we can add the edge to the network, this includes updating.
+
+        Parameters
+        ----------
+            rng: random.Random
+                The random generator for the mutation (see 'Population.genome_rng'), by default the global one.
         """
         while True:
             # Idea: at some point we will find a connection that is allowed so we just try as long as we have to
 
             # Choose between an input and a hidden node, but not the three output nodes!
-            decision_index = randint(0, len(self.nodes)-4)
+            decision_index = rng.randint(0, len(self.nodes)-4)
 
             # If the 'decision_index' is in the range 0-485 an input node will be chosen, else a hidden node.
             if decision_index < 486:
                 # TODO: wollen wir wirklich auch die Position, an der die Figur gerade steht so stark bewerten?
                 mean_row = 12
-                sd_row = 4
+                variance_row = 4
                 mean_col = 13
-                sd_col = 15
+                variance_col = 15
 
-                # TODO: Fragestunde!! Ist die Auswahl der Spalten unabh. von der der Zeilen oder brauchen wir Kovarianzmatrix für multivariate Normalverteilung?
+                # Rows and columns are independent (diagonal covariance matrix), so both are drawn from their own normal
+                # distribution.
                 # Try to find values within the grid of pixels (27x18)
                 while True:
-                    [row, col] = np.random.multivariate_normal([mean_row, mean_col], [[sd_row, 0], [0, sd_col]])
+                    row = rng.gauss(mean_row, math.sqrt(variance_row))
+                    col = rng.gauss(mean_col, math.sqrt(variance_col))
                     if (0 < row < 18) and (0 < col < 27):
                         break
 
@@ -181,13 +205,13 @@ class Network:
                 index_1 = 27*row + col
             else:
                 # Choose a hidden node following a discrete equal distribution.
-                index_1 = randint(489, len(self.nodes)-1)
+                index_1 = rng.randint(489, len(self.nodes)-1)
 
-            index_2 = randint(486, len(self.nodes)-1)
+            index_2 = rng.randint(486, len(self.nodes)-1)
             node_1 = self.nodes[index_1]
             node_2 = self.nodes[index_2]
 
-            weight = randint(0, 1)
+            weight = rng.randint(0, 1)
             if weight == 0:
                 weight = -1
 
@@ -209,19 +233,29 @@ class Network:
                 continue
 
             self.edges.add(edge)
+            self.version += 1
             break
 
         # need to return self!
         return self
 
-    def node_mutation(self):
+    def node_mutation(self, rng=random):
         """
         Function to mutate the network 'self' by splitting up an edge and inserting a new node.
         The edge is chosen at random and then the updating steps take place with creating the new node and edges, adding
         the new edges and removing the old ones.
+
+        Parameters
+        ----------
+            rng: random.Random
+                The random generator for the mutation (see 'Population.genome_rng'), by default the global one.
         """
-        edge_index = randint(0, len(self.edges)-1)
-        edge = list(self.edges)[edge_index]
+        # The order of the set depends on the memory addresses of the edges, so the edges are ordered by the positions
+        # of their nodes to choose the same edge in every run.
+        positions = {id(node): index for index, node in enumerate(self.nodes)}
+        ordered_edges = sorted(self.edges, key=lambda e: (positions[id(e.begin)], positions[id(e.end)], e.weight))
+        edge_index = rng.randint(0, len(ordered_edges)-1)
+        edge = ordered_edges[edge_index]
         begin_node = edge.get_begin()
         end_node = edge.get_end()
         edge_weight = edge.get_weight()
@@ -248,6 +282,7 @@ class Network:
 
         # Add new node to network
         self.nodes.append(node)
+        self.version += 1
 
         # need to return self
         return self
@@ -265,12 +300,16 @@ class Network:
     # 'nodes' and 'edges' will be modified through these methods, but cannot be set separately.
     def add_node(self, node):
         self.nodes.append(node)
+        self.version += 1
 
     def remove_node(self, index):
         self.nodes.remove(index)
+        self.version += 1
 
     def add_edge(self, edge):
         self.edges.add(edge)
+        self.version += 1
 
     def remove_edge(self, edge):
         self.edges.remove(edge)
+        self.version += 1
@@ -1,13 +1,24 @@
+import weakref
+
 import pygame
 from neat.node import *
 
 TILESIZE = 10
+# more edges than this are bundled: edges between nearby input nodes and the same end node are drawn as one line
+MAX_EDGES = 1500
+# size of the squares of input nodes whose edges are bundled, in tiles
+BUNDLE_TILES = 3
+
+COLORS = {1: (255, 255, 255), -1: (255, 0, 0), 2: (255, 0, 0, 128), 3: (0, 255, 0), 4: (0, 0, 0), 5: (71, 60, 139)}
+
+# the layout of each network: network -> (version, positions of the nodes, surface with the edges, non-input nodes)
+_layouts = weakref.WeakKeyDictionary()
 
 
 def render_network(surface, network, values):
     """
-    Zeichnet die Minimap und den Netzwerkgraphen 
-    
+    Zeichnet die Minimap und den Netzwerkgraphen
+
     Argumente:
         surface: ein pygame.Surface der Groesse 750 x 180 Pixel.
                  Darauf soll der Graph und die Minimap gezeichnet werden.
@@ -19,7 +30,7 @@ def render_network(surface, network, values):
                  0 leerer Raum
                 Die Spielfigur befindet sich immer ca. bei der Position (10, 9) und (10, 10).
     """
-    colors = {1: (255, 255, 255), -1: (255, 0, 0), 2: (255, 0, 0, 128), 3: (0, 255, 0), 4: (0, 0, 0), 5: (71, 60, 139)}
+    colors = COLORS
     # draw slightly gray background for the minimap
     pygame.draw.rect(surface, (128, 128, 128, 128), (0, 0, 27 * TILESIZE, 18 * TILESIZE))
     # draw minimap
@@ -36,6 +47,35 @@ def render_network(surface, network, values):
     --------------------------------------------------------------------------------------------------------------------
     """
 
+    # the edges only change when the network mutates, so they are drawn once per version of the network
+    layout = _layouts.get(network)
+    if layout is None or layout[0] != network.version:
+        layout = (network.version,) + create_layout(network, surface.get_size())
+        _layouts[network] = layout
+    _, positions, edge_surface, active_nodes = layout
+    surface.blit(edge_surface, (0, 0))
+
+    # draw the output and hidden nodes with their current activation (green: positive, red: negative)
+    for node in active_nodes:
+        position = positions[node]
+        out = node.get_out()
+        surface.fill(colors[3] if out > 0 else colors[-1] if out < 0 else colors[1], position)
+        pygame.draw.rect(surface, colors[4], position, 1)
+
+
+def create_layout(network, size):
+    """
+    Arranges the nodes of 'network' and draws the outlines of the connected input nodes and the edges on a transparent
+    surface of 'size'.
+
+    Returns
+    -------
+        (dict, pygame.Surface, list)
+            The position (x, y, width, height) of each drawn node, the surface and the output and hidden nodes.
+    """
+    colors = COLORS
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+
     # import the information we need to draw the network
     nodes = network.get_nodes()
     edges = network.get_edges()
@@ -58,18 +98,15 @@ def render_network(surface, network, values):
             pygame.draw.rect(surface, colors[5], position, 1)
         index += 1
 
-    # draw output_nodes
+    # position the output_nodes
     y_pos = 4 * TILESIZE
     x_pos = 70 * TILESIZE
 
     for node in output_nodes:
-        position = (x_pos, y_pos, TILESIZE, TILESIZE)
-        nodes_dict[node] = position
-        surface.fill(colors[1], position)
-        pygame.draw.rect(surface, (0, 0, 0), position, 1)
+        nodes_dict[node] = (x_pos, y_pos, TILESIZE, TILESIZE)
         y_pos += 5 * TILESIZE
 
-    # draw hidden_nodes. We order the nodes by layer.
+    # position the hidden_nodes. We order the nodes by layer.
 
     # step 1: sort the nodes by layer
     sort_by_layer = {}
@@ -86,34 +123,43 @@ def render_network(surface, network, values):
     dist = 30*TILESIZE
 
     # step 3: arrange the nodes based on their layer and the number of nodes per layer
-    for i in range(number_layers):
-        numb = len(sort_by_layer[i+2])
+    for i, layer in enumerate(sorted(sort_by_layer)):
+        numb = len(sort_by_layer[layer])
         x_pos = dist + width * (i + 1)/(number_layers + 1)
         index_y = 0
-        for node in sort_by_layer[i+2]:
+        for node in sort_by_layer[layer]:
             y_pos = height * (index_y + 1)/(numb + 1)
-            position = (x_pos, y_pos, TILESIZE, TILESIZE)
-            nodes_dict[node] = position
-            surface.fill(colors[1], position)
-            pygame.draw.rect(surface, colors[4], position, 1)
+            nodes_dict[node] = (x_pos, y_pos, TILESIZE, TILESIZE)
             index_y += 1
 
-    # draw the edges by going through all existing edges
-    for edge in edges:
-        begin = edge.get_begin()
-        end = edge.get_end()
-        weight = edge.get_weight()
-        begin_pos = list(nodes_dict[begin][:2])
-        end_pos = list(nodes_dict[end][:2])
-
+    # draw the edges (or their bundles), red for the weight -1 and green for 1
+    for begin_pos, end_pos, weight in edge_lines(edges, nodes_dict, set(input_nodes)):
         # add half a TILESIZE so that the edge starts in the middle of a tile
-        begin_pos[0] += 0.5 * TILESIZE
-        begin_pos[1] += 0.5 * TILESIZE
-        end_pos[0] += 0.5 * TILESIZE
-        end_pos[1] += 0.5 * TILESIZE
-
-        # if weight is -1, draw red line, if weight is 1 draw green line
-        if weight == -1:
-            pygame.draw.line(surface, colors[-1], begin_pos, end_pos, width=1)
-        else:
-            pygame.draw.line(surface, colors[3], begin_pos, end_pos, width=1)
+        begin_pos = (begin_pos[0] + 0.5 * TILESIZE, begin_pos[1] + 0.5 * TILESIZE)
+        end_pos = (end_pos[0] + 0.5 * TILESIZE, end_pos[1] + 0.5 * TILESIZE)
+        pygame.draw.line(surface, colors[-1] if weight == -1 else colors[3], begin_pos, end_pos, width=1)
+
+    return nodes_dict, surface, output_nodes + hidden_nodes
+
+
+def edge_lines(edges, positions, input_nodes):
+    """
+    Returns the lines (begin, end, weight) to draw for 'edges': one per edge, or if there are more than MAX_EDGES, one
+    per bundle of edges with the same weight and end node that begin at input nodes in the same square of
+    BUNDLE_TILES x BUNDLE_TILES tiles. Bundles begin in the middle of their square; if there are still too many, the
+    ones with the most edges are drawn.
+    """
+    lines = [(positions[edge.get_begin()][:2], positions[edge.get_end()][:2], edge.get_weight()) for edge in edges]
+    if len(lines) <= MAX_EDGES:
+        return lines
+
+    bundle_size = BUNDLE_TILES * TILESIZE
+    bundles = {}
+    for edge, (begin_pos, end_pos, weight) in zip(edges, lines):
+        if edge.get_begin() in input_nodes:
+            begin_pos = ((begin_pos[0] // bundle_size + 0.5) * bundle_size - 0.5 * TILESIZE,
+                         (begin_pos[1] // bundle_size + 0.5) * bundle_size - 0.5 * TILESIZE)
+        key = (begin_pos, end_pos, weight)
+        bundles[key] = bundles.get(key, 0) + 1
+    # (ties are broken by the position, so the same lines are chosen in every run)
+    return sorted(bundles, key=lambda line: (-bundles[line], line))[:MAX_EDGES]
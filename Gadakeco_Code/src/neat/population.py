@@ -2,14 +2,27 @@ from src.neat.network import Network
 from time import time
 from pickle import dump, load
 from copy import deepcopy
+import hashlib
 import math
 import random
 
 
+def derive_seed(*parts):
+    """
+    Returns a seed for 'random.Random' derived from 'parts', e.g. the seed of a population and the ids of a network and
+    its parent. Unlike 'hash' of a string it's the same in every run.
+    """
+    digest = hashlib.sha256("/".join(str(part) for part in parts).encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
 class Population:
     """
     Class representing a whole population of 'Network' instances, each belonging to a certain generation.
     Between generations there is: selection of the fittest networks; mutation of those selected networks.
+    All random decisions are drawn from generators seeded by 'seed', so a repeated or resumed run creates the same
+    networks: the population has its own generator 'rng' (pickled with it) and every mutation uses a generator derived
+    from the ids of the new network and its parent.
 
     Methods
     -------
@@ -17,14 +30,22 @@ class Population:
             Gets the path 'filename' for a pickeled file, then unpickles it to get the saved population.
         save_to_file(filename):
             Pickles the current population and saves it to the path 'filename'.
+        set_rng_stream(self, stream):
+            Separates the random decisions from those of other populations with the same seed.
+        genome_rng(self, network_id, parent_id): random.Random
+            The random generator for the mutation that creates the network 'network_id'.
+        elite_count(self, current_size=None): int
+            Number of the fittest networks that are selected for the next generation.
+        create_child(self, parent, node_mutation=False): Network
+            Mutates a copy of 'parent' and assigns it a new id.
         create_next_generation(self): list(Network)
             Takes current generation 'self', selects and mutates to get new generation 'list(Network)'.
     """
-    def __init__(self, seed, size):
+    def __init__(self, seed, size, decision_interval=1):
         """
         Initialise a new population of 'size'=n elements of 'Network', all of which will be directly mutated by adding
         an edge.
-        There are the attributes 'seed' for the random generator, 'generation_count' and an identifying 'name',
+        There are the attributes 'seed' for the random generators, 'generation_count' and an identifying 'name',
         the current time stamp.
 
         Parameters
@@ -33,9 +54,18 @@ class Population:
                 For the random generator
             size: int
                 The amount of instances of 'Network', that will make up the population
+            decision_interval: int
+                The networks are queried every 'decision_interval' physic updates and hold their action in between.
+                It's stored with the population, so the fitness of all its generations stays comparable.
         """
         self.seed = seed
         self.size = size
+        self.decision_interval = decision_interval
+        # Number of ids given to networks so far, the ids are unique within the population.
+        self.network_count = 0
+        # The random generator for the decisions of the population (e.g. shuffling networks with the same fitness).
+        self.rng_stream = ""
+        self.rng = random.Random(derive_seed(seed, self.rng_stream, "population"))
 
         self.name = str(time())
         # The attribute 'generation_count' will be incremented automatically by the game Gadakeco.
@@ -43,10 +73,18 @@ class Population:
 
         self.current_generation = []
         for i in range(size):
-            new = Network()
-            mutated = new.edge_mutation()
+            network_id = self.new_network_id()
+            mutated = Network().edge_mutation(self.genome_rng(network_id, None))
+            mutated.network_id = network_id
             self.current_generation.append(mutated)
 
+    def __setstate__(self, state):
+        # Populations pickled by older versions lack some attributes, so start with their defaults.
+        self.__dict__.update(decision_interval=1, network_count=0, rng_stream="")
+        self.__dict__.update(state)
+        if "rng" not in state:
+            self.rng = random.Random(derive_seed(self.seed, self.rng_stream, "population", self.generation_count))
+
     @staticmethod
     def load_from_file(filename):
         pickle_in = open(filename, 'rb')
@@ -59,6 +97,47 @@ class Population:
             dump(self, pickle_file)
         print("called save_to_file")
 
+    def new_network_id(self):
+        self.network_count += 1
+        return self.network_count
+
+    def set_rng_stream(self, stream):
+        # e.g. for copies of a population that should evolve differently
+        self.rng_stream = stream
+        self.rng = random.Random(derive_seed(self.seed, stream, "population"))
+
+    def genome_rng(self, network_id, parent_id):
+        return random.Random(derive_seed(self.seed, self.rng_stream, parent_id, network_id))
+
+    def create_child(self, parent, node_mutation=False):
+        """
+        Mutates a copy of 'parent' by adding an edge or, if 'node_mutation' is set, a node. The child gets a new id
+        and remembers the id of its parent.
+        """
+        if parent.network_id is None:
+            # networks of populations pickled by older versions
+            parent.network_id = self.new_network_id()
+        child_id = self.new_network_id()
+        rng = self.genome_rng(child_id, parent.network_id)
+        child = deepcopy(parent)
+        child = child.node_mutation(rng) if node_mutation else child.edge_mutation(rng)
+        child.network_id = child_id
+        child.parent_id = parent.network_id
+        return child
+
+    def elite_count(self, current_size=None):
+        """
+        Number of networks that are taken unmodified into the next generation (and are mutated to create it).
+        """
+        if current_size is None:
+            current_size = len(self.current_generation)
+
+        # Keep the number of networks in a generation roughly the same by rounding up or down
+        if current_size >= self.size:
+            return math.floor(0.1 * current_size)
+        else:
+            return math.ceil(0.1 * current_size)
+
     def create_next_generation(self):
         """
         Step 1: Take list 'current_generation', sort in descending order by return values of given 'key'-function, in
@@ -91,30 +170,27 @@ class Population:
         # If many networks have the same fitness, shuffle them
         if index >= self.size * 0.1:
             ordered_current_generation = ordered_current_generation[:index]
-            random.shuffle(ordered_current_generation)
+            self.rng.shuffle(ordered_current_generation)
 
         # Step 2
 
-        # Keep the number of networks in a generation roughly the same by rounding up or down
-        if current_size >= self.size:
-            percent = math.floor(0.1 * current_size)
-        else:
-            percent = math.ceil(0.1 * current_size)
+        percent = self.elite_count(current_size)
 
         # Take the needed networks to build a new generation
         new_10 = ordered_current_generation[:percent]
+        for net in new_10:
+            if net.network_id is None:
+                net.network_id = self.new_network_id()
         new_generation = deepcopy(new_10)
 
         # Step 3
 
         for i in range(8):
             for net in new_10:
-                net_copy = deepcopy(net)
-                new_generation.append(net_copy.edge_mutation())
+                new_generation.append(self.create_child(net))
 
         for net in new_10:
-            net_copy = deepcopy(net)
-            new_generation.append(net_copy.node_mutation())
+            new_generation.append(self.create_child(net, node_mutation=True))
 
         self.current_generation = new_generation
 
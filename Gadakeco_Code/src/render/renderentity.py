@@ -19,8 +19,8 @@ class RenderBase:
         self._surf = self.createSurface()
 
     def createSurface(self):
-        surf = pygame.Surface((self._entity.getWidth(), self._entity.getHeight()), 0, self._texture.surface)
-        return texturehandler.fillSurface(surf, self._texture)
+        # (shared with all entities of the same texture and size)
+        return texturehandler.tiledSurface(self._texture, self._entity.getWidth(), self._entity.getHeight())
 
     def render(self, screen, world):
         screen.blit(self._surf, self._entity.getCamRelPos(world.camera))
@@ -28,6 +28,26 @@ class RenderBase:
             pygame.draw.rect(screen, (0, 255, 0), (
             *self._entity.getCamRelPos(world.camera), self._entity.getWidth(), self._entity.getHeight()), 1)
 
+    def renderAt(self, surface, x, y, scale=1):
+        # draws the entity at (x, y) of a surface (e.g. a layer of static entities), 'scale' times its size
+        if scale == 1:
+            surface.blit(self._surf, (x, y))
+            return
+        # (the size follows from the scaled edges, so adjacent entities don't leave gaps)
+        left = int(x * scale)
+        top = int(y * scale)
+        width = max(int((x + self._entity.getWidth()) * scale) - left, 1)
+        height = max(int((y + self._entity.getHeight()) * scale) - top, 1)
+        tileSize = max(round(40 * scale), 1)
+        surface.blit(texturehandler.tiledSurface(self._texture, width, height, (tileSize, tileSize)), (left, top))
+
+    def renderScaled(self, screen, world, scale):
+        """
+        draws the entity 'scale' times its size (e.g. for the thumbnail of a world)
+        """
+        x, y = self._entity.getCamRelPos(world.camera)
+        self.renderAt(screen, x, y, scale)
+
 
 class RenderLiving(RenderBase):
     """
@@ -46,9 +66,10 @@ class RenderLiving(RenderBase):
             raise ValueError(
                 str(self._texture) + " has to have at least 2 frames to use for a living entity (standing + moving)")
 
-        surf = pygame.transform.scale(self._texture.surface,
-                                      (self._entity.getWidth() * self._frameCount, self._entity.getHeight()))
-        return (surf, pygame.transform.flip(surf, True, False))
+        width = self._entity.getWidth() * self._frameCount
+        height = self._entity.getHeight()
+        return (texturehandler.scaledSurface(self._texture, width, height),
+                texturehandler.scaledSurface(self._texture, width, height, flipped=True))
 
     def getFrame(self, world, flipped):
         if self._entity._velocityX == 0:
@@ -68,6 +89,15 @@ class RenderLiving(RenderBase):
         screen.blit(self._surf[flipped], self._entity.getCamRelPos(world.camera),
                     (frame * self._entity.getWidth(), 0, self._entity.getWidth(), self._entity.getHeight()))
 
+    def renderScaled(self, screen, world, scale):
+        width = max(round(self._entity.getWidth() * scale), 1)
+        height = max(round(self._entity.getHeight() * scale), 1)
+        flipped = self._entity._velocityX < 0
+        frame = self.getFrame(world, flipped)
+        x, y = self._entity.getCamRelPos(world.camera)
+        screen.blit(texturehandler.scaledSurface(self._texture, width * self._frameCount, height, flipped),
+                    (int(x * scale), int(y * scale)), (frame * width, 0, width, height))
+
 
 class RenderPlayer(RenderLiving):
     """
@@ -88,6 +118,22 @@ class RenderPlayer(RenderLiving):
             return self._frameCount - 1 - frame if flipped else frame
 
     def render(self, screen, world):
+        self.playSounds()
+
+        flipped = self._entity._velocityX < 0
+        frame = self.getFrame(world, flipped)
+        screen.blit(self._surf[flipped], self._entity.getCamRelPos(world.camera),
+                    (frame * self._entity.getWidth(), 0, self._entity.getWidth(), self._entity.getHeight()))
+
+        if Entries.ShowDebug.getCurrentValue():
+            pygame.draw.rect(screen, (255, 0, 0), (
+            *self._entity.getCamRelPos(world.camera), self._entity.getWidth(), self._entity.getHeight()), 1)
+
+    def renderScaled(self, screen, world, scale):
+        self.playSounds()
+        RenderLiving.renderScaled(self, screen, world, scale)
+
+    def playSounds(self):
         # TODO: find better location for this
         # jump sound
         if self._entity.jumped:
@@ -101,12 +147,3 @@ class RenderPlayer(RenderLiving):
         if self._entity.falling:
             Sound.play(Sound.falling)
             self._entity.falling = False
-
-        flipped = self._entity._velocityX < 0
-        frame = self.getFrame(world, flipped)
-        screen.blit(self._surf[flipped], self._entity.getCamRelPos(world.camera),
-                    (frame * self._entity.getWidth(), 0, self._entity.getWidth(), self._entity.getHeight()))
-
-        if Entries.ShowDebug.getCurrentValue():
-            pygame.draw.rect(screen, (255, 0, 0), (
-            *self._entity.getCamRelPos(world.camera), self._entity.getWidth(), self._entity.getHeight()), 1)
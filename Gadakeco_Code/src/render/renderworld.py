@@ -1,53 +1,173 @@
+import math
+
 import pygame
-from pygame.font import SysFont
 
 import render.renderentity as renderent
+import util.fonthandler as fonthandler
 import util.texturehandler as texhandler
+from lib.config import Entries
 from lib.constants import screenWidth, screenHeight
+from worldgeneration.entityfactory import EntityFactory
 from worldgeneration.renderentityfactory import RenderEntityFactory
 
+# size of the square layers the static entities are drawn on
+layerSize = 512
+# color of the transparent parts of the layers
+layerColorKey = (255, 0, 255)
+
 
 class RenderWorld:
     """
     renderer for worlds
+    (worlds are simulated headless until a renderer is attached, 'detach' makes them headless again)
     """
 
     def __init__(self, world):
         self._world = world
-        # update the entityfactory to a rendered version
-        self._world.worldgen.ef = RenderEntityFactory()
-        # attach the renderer for the player
-        self._world.player.renderer = renderent.RenderPlayer(self._world.player)
+        self.attachRenderers()
 
         # the background texture
-        self._background = pygame.transform.scale(texhandler.Textures.gameBG.surface, (2 * screenWidth, screenHeight))
+        self._background = texhandler.scaledSurface(texhandler.Textures.gameBG, 2 * screenWidth, screenHeight)
         self._overlays = texhandler.adjustedSurface(texhandler.Textures.overlays, height=32)
-        self._fontObj = SysFont("Monospace", 20, bold=True)
+        self._fontObj = fonthandler.getFont("Monospace", 20, bold=True)
+
+        # the layers of the static entities by their (column, row), None for layers without entities
+        self._layers = {}
+        # the scale the layers are drawn with
+        self._layerScale = 1
+        # number of static entities that were known when the layers were built
+        self._layeredCount = 0
+
+    def attachRenderers(self):
+        # update the entityfactory to a rendered version
+        factory = RenderEntityFactory()
+        self._world.worldgen.ef = factory
+        # attach the renderer for the player
+        self._world.player.renderer = renderent.RenderPlayer(self._world.player)
+        # and for the entities that were created headless
+        for ent in self._world.staticEntities + self._world.dynamicEntities:
+            if not hasattr(ent, "renderer"):
+                factory.attachRenderer(ent)
+
+    def detach(self):
+        """
+        removes this renderer and the ones of the entities from the world, new entities are created headless again
+        """
+        self._world.worldgen.ef = EntityFactory()
+        for ent in [self._world.player] + self._world.staticEntities + self._world.dynamicEntities:
+            if hasattr(ent, "renderer"):
+                del ent.renderer
+        if getattr(self._world, "renderer", None) is self:
+            del self._world.renderer
 
     def render(self, screen):
-        # draw the backgound
-        bgWidth = self._background.get_width()
-        x = int((self._world.camera.getX() * 0.1) % bgWidth)
+        self.renderScene(screen, 1)
+        # draw the overlay
+        self.renderOverlay(screen)
 
-        if x + screenWidth <= bgWidth:
-            screen.blit(self._background, (0, 0), (x, 0, x + screenWidth, screenHeight))
+    def renderThumbnail(self, surface):
+        """
+        draws the world scaled down to the width of 'surface' (e.g. for an overview of several worlds)
+        """
+        scale = surface.get_width() / screenWidth
+        self.renderScene(surface, scale)
+        self.renderThumbnailOverlay(surface, scale)
+
+    def renderScene(self, screen, scale):
+        """
+        draws the background and the entities 'scale' times their size
+        """
+        # draw the backgound
+        width = int(screenWidth * scale)
+        height = int(screenHeight * scale)
+        background = self._background if scale == 1 else texhandler.scaledSurface(texhandler.Textures.gameBG,
+                                                                                   2 * width, height)
+        bgWidth = background.get_width()
+        x = int((self._world.camera.getX() * 0.1 * scale) % bgWidth)
+
+        if x + width <= bgWidth:
+            screen.blit(background, (0, 0), (x, 0, x + width, height))
         # end of texture reached
         else:
-            drawWidth = x + screenWidth - bgWidth
-            screen.blit(self._background, (0, 0), (x, 0, x + drawWidth, screenHeight))
-            screen.blit(self._background, (screenWidth - drawWidth, 0), (0, 0, drawWidth, screenHeight))
+            drawWidth = x + width - bgWidth
+            screen.blit(background, (0, 0), (x, 0, x + drawWidth, height))
+            screen.blit(background, (width - drawWidth, 0), (0, 0, drawWidth, height))
 
         # draw the static entities (e.g. blocks)
-        for ent in self._world.visibleStaticEntities:
-            ent.renderer.render(screen, self._world)
-        # draw the dynamic entities (enemies, projectiles, ...)
-        for ent in self._world.visibleDynamicEntities:
-            ent.renderer.render(screen, self._world)
-        # draw the player
-        self._world.player.renderer.render(screen, self._world)
-
-        # draw the overlay
-        self.renderOverlay(screen)
+        self.renderStatic(screen, scale)
+        # draw the dynamic entities (enemies, projectiles, ...) and the player
+        for ent in self._world.visibleDynamicEntities + [self._world.player]:
+            if scale == 1:
+                ent.renderer.render(screen, self._world)
+            else:
+                ent.renderer.renderScaled(screen, self._world, scale)
+
+    def renderStatic(self, screen, scale=1):
+        """
+        draws the static entities from the layers that overlap the camera
+        (static entities never change, so they are drawn on a layer only once)
+        """
+        # the debug frames are drawn by the entity renderers
+        if Entries.ShowDebug.getCurrentValue():
+            for ent in self._world.visibleStaticEntities:
+                if scale == 1:
+                    ent.renderer.render(screen, self._world)
+                else:
+                    ent.renderer.renderScaled(screen, self._world, scale)
+            return
+
+        if scale != self._layerScale:
+            self._layers = {}
+            self._layerScale = scale
+
+        # rebuild the layers new entities were generated on
+        staticEntities = self._world.staticEntities
+        if len(staticEntities) > self._layeredCount:
+            for ent in staticEntities[self._layeredCount:]:
+                for layer in self.getLayers(ent.getX(), ent.getY(), ent.getWidth(), ent.getHeight()):
+                    self._layers.pop(layer, None)
+            self._layeredCount = len(staticEntities)
+
+        # (whole pixels, like the positions of entities that are drawn by themselves)
+        camX = math.ceil(self._world.camera.getX())
+        camY = math.ceil(self._world.camera.getY())
+        for column, row in self.getLayers(camX, camY, screenWidth, screenHeight):
+            if (column, row) not in self._layers:
+                self._layers[column, row] = self.createLayer(column, row)
+            layer = self._layers[column, row]
+            if layer is not None:
+                screen.blit(layer, (int((column * layerSize - camX) * scale), int((row * layerSize - camY) * scale)))
+
+        # release the layers that are more than one layer out of view
+        kept = set(self.getLayers(camX - layerSize, camY - layerSize, screenWidth + 2 * layerSize,
+                                  screenHeight + 2 * layerSize))
+        for layer in [layer for layer in self._layers if layer not in kept]:
+            del self._layers[layer]
+
+    def getLayers(self, x, y, width, height):
+        # the (column, row) of the layers that overlap the area
+        return [(column, row) for column in range(int(x // layerSize), int((x + width - 1) // layerSize) + 1)
+                for row in range(int(y // layerSize), int((y + height - 1) // layerSize) + 1)]
+
+    def createLayer(self, column, row):
+        """
+        draws the static entities that overlap the layer at (column, row) on a new surface (with the scale of the layers)
+        """
+        x = column * layerSize
+        y = row * layerSize
+        entities = [ent for ent in self._world.staticEntities
+                    if ent.getX() < x + layerSize and ent.getX() + ent.getWidth() > x
+                    and ent.getY() < y + layerSize and ent.getY() + ent.getHeight() > y]
+        if not entities:
+            return None
+
+        size = math.ceil(layerSize * self._layerScale)
+        layer = pygame.Surface((size, size)).convert()
+        layer.fill(layerColorKey)
+        for ent in entities:
+            ent.renderer.renderAt(layer, ent.getX() - x, ent.getY() - y, self._layerScale)
+        layer.set_colorkey(layerColorKey, pygame.RLEACCEL)
+        return layer
 
     def renderOverlay(self, screen):
         # draw hearts
@@ -65,23 +185,34 @@ class RenderWorld:
 
         x = screenWidth - 170
         # draw seed
-        renderedSeed = self._fontObj.render(str(int(self._world.seed)), 1, (0, 0, 0))
+        renderedSeed = fonthandler.renderText(self._fontObj, str(int(self._world.seed)), (0, 0, 0))
         screen.blit(self._overlays, (x, 15), (192, 0, 32, 32))
         screen.blit(renderedSeed, (x + 42, 22))
 
         # draw time
         x -= 170
-        renderedTime = self._fontObj.render("{0:.2f}".format(self._world.time), 1, (0, 0, 0))
+        renderedTime = fonthandler.renderText(self._fontObj, "{0:.2f}".format(self._world.time), (0, 0, 0))
         screen.blit(self._overlays, (x, 15), (96, 0, 32, 32))
         screen.blit(renderedTime, (x + 42, 22))
 
         # draw points
         x -= 170
-        renderedPoints = self._fontObj.render(str(int(self._world.points)), 1, (0, 0, 0))
+        renderedPoints = fonthandler.renderText(self._fontObj, str(int(self._world.points)), (0, 0, 0))
         screen.blit(self._overlays, (x, 15), (128, 0, 32, 32))
         screen.blit(renderedPoints, (x + 42, 22))
 
 
+    def renderThumbnailOverlay(self, surface, scale):
+        # only the hearts, scaled like the world
+        size = round(32 * scale)
+        overlays = texhandler.scaledSurface(texhandler.Textures.overlays, round(self._overlays.get_width() * scale),
+                                            size)
+        for i in range(3):
+            x = round((30 + i * 34) * scale)
+            heart = 0 if self._world.player.state >= i else size
+            surface.blit(overlays, (x, round(15 * scale)), (heart, 0, size, size))
+
+
 class RenderNeuronalWorld(RenderWorld):
     """
     renderer for neuronal worlds
@@ -91,6 +222,13 @@ class RenderNeuronalWorld(RenderWorld):
         RenderWorld.renderOverlay(self, screen)
 
         # draw fitness
-        renderedFitness = self._fontObj.render("{0:.2f}".format(self._world.nn.fitness), 1, (0, 0, 0))
+        renderedFitness = fonthandler.renderText(self._fontObj, "{0:.2f}".format(self._world.nn.fitness), (0, 0, 0))
         screen.blit(self._overlays, (300, 15), (160, 0, 32, 32))
         screen.blit(renderedFitness, (342, 22))
+
+    def renderThumbnailOverlay(self, surface, scale):
+        RenderWorld.renderThumbnailOverlay(self, surface, scale)
+
+        # draw fitness (not scaled, so it stays readable)
+        renderedFitness = fonthandler.renderText(self._fontObj, "{0:.2f}".format(self._world.nn.fitness), (0, 0, 0))
+        surface.blit(renderedFitness, (surface.get_width() - renderedFitness.get_width() - 8, 4))
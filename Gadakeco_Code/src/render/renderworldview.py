@@ -0,0 +1,128 @@
+from copy import copy
+
+import render.renderentity as renderent
+import util.texturehandler as texhandler
+from camera import Camera
+from entity.entitybase import EntityBase
+from render.renderworld import RenderNeuronalWorld
+from worldgeneration.renderentityfactory import getBlockTexture
+
+
+class EntityView(EntityBase):
+    """
+    an entity of a world that is simulated in another process (see training.background)
+    """
+
+    def __init__(self, x, y, width, height):
+        EntityBase.__init__(self, x, y, width, height)
+        self._lastX = x
+        self._lastY = y
+        self._velocityX = 0
+        self._inAir = False
+        # the state of the player
+        self.state = 2
+        self.invulTimer = 0
+        # no sounds for worlds in other processes
+        self.jumped = False
+        self.hurt = False
+        self.falling = False
+
+    def getMidX(self):
+        return self.getX() + self.getWidth() / 2.0
+
+    def getMidY(self):
+        return self.getY() + self.getHeight() / 2.0
+
+    def setPosition(self, x, y):
+        self._lastX = self._aabb.x
+        self._lastY = self._aabb.y
+        self._aabb.x = x
+        self._aabb.y = y
+
+
+class WorldView:
+    """
+    a neuronal world that is simulated in another process, shown by the snapshots of its state
+    (has everything RenderNeuronalWorld and the network renderer need)
+    """
+
+    def __init__(self, seed, nn):
+        self.seed = seed
+        # a shallow copy has its own fitness but shares the nodes and edges of the network
+        self.nn = copy(nn)
+        self.time = 0.0
+        self.points = 0
+        self.ticks = 0
+        self.minimapValues = [0] * 18 * 27
+
+        self.player = EntityView(480, (640 - 80) - 40, 38, 76)
+        self.camera = Camera(self.player)
+        self.visibleStaticEntities = []
+        self.visibleDynamicEntities = []
+        # only the visible entities are known
+        self.staticEntities = self.visibleStaticEntities
+        self.dynamicEntities = self.visibleDynamicEntities
+        # the entities by their id in the simulating process
+        self._entities = {}
+        self.renderer = RenderWorldView(self)
+
+    def apply(self, snapshot):
+        """
+        takes the state of a snapshot (see training.background.create_snapshot)
+        """
+        self.time = snapshot["time"]
+        self.points = snapshot["points"]
+        self.ticks = snapshot["ticks"]
+        self.nn.fitness = snapshot["fitness"]
+        self.minimapValues = snapshot["minimap"]
+        self.camera.setPosition(*snapshot["camera"])
+
+        x, y, self.player._velocityX, self.player._inAir, self.player.state, self.player.invulTimer = snapshot["player"]
+        self.player.setPosition(x, y)
+
+        entities = {}
+        self.visibleStaticEntities = [self.getEntity(entities, "block", *state) for state in snapshot["static"]]
+        self.visibleDynamicEntities = []
+        self.staticEntities = self.visibleStaticEntities
+        self.dynamicEntities = self.visibleDynamicEntities
+        for kind, entityId, x, y, width, height, velocityX in snapshot["dynamic"]:
+            ent = self.getEntity(entities, kind, entityId, x, y, width, height)
+            ent._velocityX = velocityX
+            self.visibleDynamicEntities.append(ent)
+        # entities that aren't visible anymore are dropped
+        self._entities = entities
+
+    def getEntity(self, entities, kind, entityId, x, y, width, height):
+        # the renderers of known entities are kept, so their surfaces are only created once
+        ent = self._entities.get(entityId)
+        # (ids of removed entities can be reused by new ones)
+        if ent is None or ent.kind != kind or ent.getWidth() != width or ent.getHeight() != height:
+            ent = EntityView(x, y, width, height)
+            ent.kind = kind
+            if kind == "enemy":
+                ent.renderer = renderent.RenderLiving(ent, texhandler.enemies[0])
+            elif kind == "coin":
+                ent.renderer = renderent.RenderBase(ent, texhandler.Textures.coin)
+            else:
+                # (the blocks of a world slice share their texture, see getBlockTexture)
+                ent.renderer = renderent.RenderBase(ent, getBlockTexture(x))
+        ent.setPosition(x, y)
+        entities[entityId] = ent
+        return ent
+
+
+class RenderWorldView(RenderNeuronalWorld):
+    """
+    renderer for worlds that are simulated in another process
+    """
+
+    def attachRenderers(self):
+        self._world.player.renderer = renderent.RenderPlayer(self._world.player)
+
+    def renderStatic(self, screen, scale=1):
+        # only the visible static entities are known, so they aren't drawn on layers
+        for ent in self._world.visibleStaticEntities:
+            if scale == 1:
+                ent.renderer.render(screen, self._world)
+            else:
+                ent.renderer.renderScaled(screen, self._world, scale)
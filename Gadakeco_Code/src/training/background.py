@@ -0,0 +1,198 @@
+"""
+Training behind the GUI: the generations are evaluated on a process pool by a thread of the GUI process, so the
+pygame main thread only draws. The worlds that are shown send lightweight snapshots of their state (positions of the
+visible entities, minimap, fitness) through a queue while they are simulated, the GUI renders them with
+'render.renderworldview.WorldView'.
+"""
+
+import atexit
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from multiprocessing import Pool
+
+from entity.entitycoin import EntityCoin
+from entity.entityenemy import EntityEnemy
+from lib import constants
+from training.evaluation import evaluate_network
+from training.scheduler import EvaluationScheduler
+from world import NeuronalWorld
+
+# the queue for the snapshots of this worker process, set by 'init_worker'
+_snapshots = None
+# seconds between two snapshots of a world
+_snapshot_interval = 1 / constants.FPS
+
+
+def init_worker(snapshots):
+    # initializer of the pool processes
+    global _snapshots
+    _snapshots = snapshots
+    # the workers are forked from the GUI, whose SDL handler turns SIGTERM into a quit event, so 'Pool.terminate'
+    # couldn't end them
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def create_snapshot(world):
+    """
+    Returns the state of 'world' that is needed to draw it (see 'render.renderworldview.WorldView.apply').
+    The entities are identified by their 'id' in this process, so the GUI can keep their renderers.
+    """
+    player = world.player
+    dynamic = []
+    for ent in world.visibleDynamicEntities:
+        kind = "coin" if isinstance(ent, EntityCoin) else "enemy" if isinstance(ent, EntityEnemy) else "block"
+        dynamic.append((kind, id(ent), ent.getX(), ent.getY(), ent.getWidth(), ent.getHeight(), ent._velocityX))
+    return {
+        "time": world.time,
+        "points": world.points,
+        "ticks": world.ticks,
+        "fitness": world.nn.fitness,
+        "minimap": list(world.minimapValues),
+        "camera": (world.camera.getX(), world.camera.getY()),
+        "player": (player.getX(), player.getY(), player._velocityX, player._inAir, player.state, player.invulTimer),
+        "static": [(id(ent), ent.getX(), ent.getY(), ent.getWidth(), ent.getHeight())
+                   for ent in world.visibleStaticEntities],
+        "dynamic": dynamic,
+    }
+
+
+def _send_snapshot(slot, generation, world):
+    # snapshots are dropped if the GUI doesn't keep up, the next one replaces them anyway
+    try:
+        _snapshots.put_nowait((slot, generation, create_snapshot(world)))
+    except queue.Full:
+        pass
+
+
+def evaluate_task(task):
+    """
+    Evaluates a network, the shown ones (with a 'slot') send snapshots of their world while being simulated.
+
+    Parameters
+    ----------
+        task: (int, dict, Network, int, int)
+            The seed of the world generator, further keyword arguments for 'NeuronalWorld', the network, the slot it
+            is shown in (None if it isn't shown) and the generation.
+
+    Returns
+    -------
+        (float, int)
+            The fitness of the network and the number of simulated physic updates.
+    """
+    seed, world_settings, network, slot, generation = task
+    if slot is None or _snapshots is None:
+        return evaluate_network(network, seed, world_settings)
+
+    world = NeuronalWorld(seed, network, **world_settings)
+    world.generatePlatform()
+    last_snapshot = 0.0
+    while world.update(constants.UPS):
+        now = time.perf_counter()
+        if now - last_snapshot >= _snapshot_interval:
+            _send_snapshot(slot, generation, world)
+            last_snapshot = now
+    _send_snapshot(slot, generation, world)
+    return world.nn.fitness, world.ticks
+
+
+class BackgroundTrainer:
+    """
+    Evolves a population on a process pool in a background thread, like 'main_simulation.main'.
+
+    Methods
+    -------
+        start(self): BackgroundTrainer
+            Starts the training thread.
+        poll(self): list[(int, int, dict)]
+            Returns the snapshots (slot, generation, snapshot) that arrived since the last call.
+        stop(self):
+            Stops the training and the worker processes, the generation that is evaluated is abandoned.
+    """
+    def __init__(self, population, number_of_workers=None, display_count=9, on_generation=None):
+        """
+        Parameters
+        ----------
+            population: Population
+                It's evolved by the training thread, the GUI should only read it.
+            number_of_workers: int
+                Number of worker processes, by default one less than there are cpus (the GUI needs one).
+            display_count: int
+                Number of networks that send snapshots: the ones with the highest fitness of the last generation.
+            on_generation: callable
+                Called in the training thread with the population and the evaluation time in seconds after each
+                evaluated generation, before the next one is created.
+        """
+        if number_of_workers is None:
+            number_of_workers = max(multiprocessing.cpu_count() - 1, 1)
+        self.population = population
+        self.display_count = display_count
+        self.on_generation = on_generation
+        # (generation, networks) of the shown networks, the index of a network is its slot
+        self.displayed = (None, [])
+
+        self._snapshots = multiprocessing.Queue(maxsize=display_count * 4)
+        self._pool = Pool(number_of_workers, initializer=init_worker, initargs=(self._snapshots,))
+        self._scheduler = EvaluationScheduler(self._pool, number_of_workers)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        # the workers can't finish on their own while the training thread waits for them, which would block the exit
+        atexit.register(self.stop)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def run(self):
+        pop = self.population
+        world_settings = {"decisionInterval": pop.decision_interval}
+        while not self._stopped.is_set():
+            networks = pop.current_generation
+            shown = sorted(range(len(networks)), key=lambda i: networks[i].fitness, reverse=True)[:self.display_count]
+            slots = {index: slot for slot, index in enumerate(shown)}
+            generation = pop.generation_count
+            self.displayed = (generation, [networks[i] for i in shown])
+
+            # the shown networks are started first, so they are on screen right away
+            estimates = [net.episode_ticks for net in networks]
+            longest = max(estimates, default=0) + 1
+            estimates = [longest if i in slots else estimate for i, estimate in enumerate(estimates)]
+            tasks = [(pop.seed, world_settings, net, slots.get(i), generation) for i, net in enumerate(networks)]
+
+            start = time.time()
+            results = self._scheduler.map(evaluate_task, tasks, estimates, stop=self._stopped)
+            if results is None or self._stopped.is_set():
+                break
+            for net, (fitness, ticks) in zip(networks, results):
+                net.fitness = fitness
+                net.episode_ticks = ticks
+
+            # 'stop' waits for this thread, so the population isn't touched anymore once it returns
+            if self._stopped.is_set():
+                break
+            pop.save_to_file(constants.res_loc("networks") + pop.name + ".pop")
+            if self.on_generation is not None:
+                self.on_generation(pop, time.time() - start)
+            if self._stopped.is_set():
+                break
+            pop.create_next_generation()
+            pop.generation_count += 1
+
+    def poll(self):
+        snapshots = []
+        while True:
+            try:
+                snapshots.append(self._snapshots.get_nowait())
+            except queue.Empty:
+                return snapshots
+
+    def stop(self):
+        atexit.unregister(self.stop)
+        self._stopped.set()
+        if self._thread.is_alive():
+            # the training thread notices within a fraction of a second, unless it's saving the population
+            self._thread.join()
+        self._pool.terminate()
+        self._pool.join()
@@ -0,0 +1,311 @@
+"""
+Distributed evaluation of networks over several machines.
+An 'EvaluationCoordinator' serves (network, seed) tasks over TCP to worker processes and collects their results.
+Workers may run on any machine that can reach the coordinator, and they may join or leave at any time: tasks of a
+worker that disconnects or stops sending heartbeats are queued again for the others.
+
+Start workers with
+    python -m training.distributed HOST:PORT --processes N --authkey SECRET
+The messages are pickled, so the coordinator and the workers have to share a secret (--authkey or the environment
+variable GADAKECO_AUTHKEY), only parties that know it can connect. Neither side starts without one.
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import queue
+import socket
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+from training.evaluation import evaluate_network
+
+# environment variable with the shared secret, if it isn't given explicitly
+AUTHKEY_VARIABLE = "GADAKECO_AUTHKEY"
+
+
+def parse_address(address):
+    # "host:port" -> ("host", port)
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def get_authkey(authkey=None):
+    """
+    Returns the shared secret as bytes: 'authkey' if it's given, otherwise the environment variable AUTHKEY_VARIABLE.
+    Raises a ValueError if there is none, as anyone who can connect could run code by sending a pickled message.
+    """
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_VARIABLE)
+    if not authkey:
+        raise ValueError("no shared secret for the distributed evaluation, pass --authkey or set {}".format(
+            AUTHKEY_VARIABLE))
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+class _WorkerConnection:
+    """
+    State of a connected worker on the side of the coordinator.
+    """
+    def __init__(self, connection, name):
+        self.connection = connection
+        self.name = name
+        self.last_seen = time.time()
+        # ids of the tasks that were sent to this worker and aren't finished yet
+        self.tasks = set()
+
+
+class EvaluationCoordinator:
+    """
+    Serves evaluation tasks to remote workers (see 'run_worker') and collects their results.
+
+    Methods
+    -------
+        start(self):
+            Starts accepting workers in the background.
+        evaluate(self, networks, seed, world_settings, estimates=None): list[(float, int)]
+            Evaluates all 'networks' on the connected workers and blocks until every result arrived.
+        close(self):
+            Disconnects all workers and stops the coordinator.
+    """
+    def __init__(self, address, authkey, heartbeat_timeout=10.0):
+        """
+        Parameters
+        ----------
+            address: (str, int)
+                The host and port the workers connect to.
+            authkey: bytes
+                Shared secret the workers have to know (see 'get_authkey').
+            heartbeat_timeout: float
+                Seconds without any message after which a busy worker is regarded as dead.
+        """
+        self.address = address
+        self.heartbeat_timeout = heartbeat_timeout
+        self._listener = Listener(address, authkey=get_authkey(authkey))
+        self._closed = False
+
+        # pending tasks ordered by their expected cost (longest first): (-estimate, task_id)
+        self._queue = queue.PriorityQueue()
+        self._lock = threading.Condition()
+        # task_id -> (estimate, payload) for all tasks without result
+        self._tasks = {}
+        self._results = {}
+        self._workers = []
+        self._task_ids = itertools.count()
+
+    def start(self):
+        threading.Thread(target=self._accept_workers, daemon=True).start()
+        threading.Thread(target=self._check_heartbeats, daemon=True).start()
+        return self
+
+    def get_worker_count(self):
+        with self._lock:
+            return len(self._workers)
+
+    def evaluate(self, networks, seed, world_settings, estimates=None):
+        """
+        Evaluates all 'networks' in worlds generated from 'seed'.
+
+        Parameters
+        ----------
+            networks: list[Network]
+            seed: int
+                The seed of the world generator.
+            world_settings: dict
+                Further keyword arguments for 'NeuronalWorld'.
+            estimates: list[float]
+                The expected cost of each evaluation, expensive ones are handed out first.
+
+        Returns
+        -------
+            list[(float, int)]
+                The fitness and episode length for each network.
+        """
+        if estimates is None:
+            estimates = [0] * len(networks)
+
+        with self._lock:
+            task_ids = []
+            for network, estimate in zip(networks, estimates):
+                task_id = next(self._task_ids)
+                self._tasks[task_id] = (estimate, (network, seed, world_settings))
+                self._queue.put((-estimate, task_id))
+                task_ids.append(task_id)
+
+            while not all(task_id in self._results for task_id in task_ids):
+                self._lock.wait()
+            return [self._results.pop(task_id) for task_id in task_ids]
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            for worker in self._workers:
+                try:
+                    worker.connection.send(("bye",))
+                    worker.connection.close()
+                except OSError:
+                    pass
+        self._listener.close()
+
+    def _accept_workers(self):
+        while not self._closed:
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError):
+                # failed handshake (e.g. wrong authkey) or closed listener
+                continue
+            threading.Thread(target=self._serve_worker, args=(connection,), daemon=True).start()
+
+    def _serve_worker(self, connection):
+        try:
+            message = connection.recv()
+        except (OSError, EOFError):
+            return
+        worker = _WorkerConnection(connection, message[1] if message[0] == "hello" else "unknown")
+        with self._lock:
+            self._workers.append(worker)
+        print("worker '{}' joined".format(worker.name))
+
+        try:
+            while not self._closed:
+                message = connection.recv()
+                worker.last_seen = time.time()
+
+                if message[0] == "result":
+                    self._store_result(worker, message[1], message[2])
+                    self._send_next_task(worker)
+                elif message[0] == "ready":
+                    self._send_next_task(worker)
+        except (OSError, EOFError):
+            pass
+        finally:
+            self._remove_worker(worker)
+
+    def _send_next_task(self, worker):
+        while not self._closed:
+            try:
+                _, task_id = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            with self._lock:
+                if task_id not in self._tasks:
+                    # already finished by another worker
+                    continue
+                payload = self._tasks[task_id][1]
+                worker.tasks.add(task_id)
+            worker.last_seen = time.time()
+            worker.connection.send(("task", task_id, payload))
+            return
+
+    def _store_result(self, worker, task_id, result):
+        with self._lock:
+            worker.tasks.discard(task_id)
+            # a task that was queued again might be finished twice, the first result counts
+            if task_id in self._tasks:
+                del self._tasks[task_id]
+                self._results[task_id] = result
+                self._lock.notify_all()
+
+    def _remove_worker(self, worker):
+        with self._lock:
+            if worker not in self._workers:
+                return
+            self._workers.remove(worker)
+            # queue the unfinished tasks of this worker again
+            for task_id in worker.tasks:
+                if task_id in self._tasks:
+                    self._queue.put((-self._tasks[task_id][0], task_id))
+            worker.tasks.clear()
+        try:
+            worker.connection.close()
+        except OSError:
+            pass
+        if not self._closed:
+            print("worker '{}' left".format(worker.name))
+
+    def _check_heartbeats(self):
+        while not self._closed:
+            time.sleep(self.heartbeat_timeout / 4)
+            with self._lock:
+                dead = [worker for worker in self._workers
+                        if worker.tasks and time.time() - worker.last_seen > self.heartbeat_timeout]
+            for worker in dead:
+                print("worker '{}' timed out".format(worker.name))
+                self._remove_worker(worker)
+
+
+def run_worker(address, authkey, heartbeat_interval=2.0):
+    """
+    Connects to the coordinator at 'address' with the shared secret 'authkey' and evaluates tasks until the
+    coordinator says goodbye or the connection is lost. While evaluating, a heartbeat is sent every
+    'heartbeat_interval' seconds.
+    """
+    connection = Client(address, authkey=get_authkey(authkey))
+    send_lock = threading.Lock()
+    busy = threading.Event()
+
+    def send(message):
+        with send_lock:
+            connection.send(message)
+
+    def heartbeat():
+        while True:
+            time.sleep(heartbeat_interval)
+            if busy.is_set():
+                try:
+                    send(("heartbeat",))
+                except OSError:
+                    return
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    send(("hello", "{}:{}".format(socket.gethostname(), os.getpid())))
+    send(("ready",))
+
+    while True:
+        try:
+            message = connection.recv()
+        except (OSError, EOFError):
+            break
+        if message[0] != "task":
+            break
+
+        _, task_id, (network, seed, world_settings) = message
+        busy.set()
+        result = evaluate_network(network, seed, world_settings)
+        busy.clear()
+        try:
+            send(("result", task_id, result))
+        except OSError:
+            break
+
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="worker processes for distributed evaluation")
+    parser.add_argument("address", help="HOST:PORT of the coordinator")
+    parser.add_argument("--processes", type=int, default=max(multiprocessing.cpu_count() - 1, 1),
+                        help="number of worker processes to start on this machine")
+    parser.add_argument("--authkey",
+                        help="shared secret of the coordinator (default: the environment variable {})".format(
+                            AUTHKEY_VARIABLE))
+    args = parser.parse_args()
+
+    try:
+        authkey = get_authkey(args.authkey)
+    except ValueError as error:
+        parser.error(str(error))
+    address = parse_address(args.address)
+    workers = [multiprocessing.Process(target=run_worker, args=(address, authkey))
+               for _ in range(args.processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == '__main__':
+    main()
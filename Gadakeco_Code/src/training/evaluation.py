@@ -0,0 +1,31 @@
+"""
+Evaluation of single networks, used by the different training drivers (see main_simulation).
+The functions are defined at module level, so they can be pickled to worker processes.
+"""
+
+from lib import constants
+from world import NeuronalWorld
+
+
+def evaluate_network(network, seed, world_settings):
+    """
+    Simulates a whole episode of 'network' in a new 'NeuronalWorld'.
+
+    Parameters
+    ----------
+        network: Network
+        seed: int
+            The seed of the world generator.
+        world_settings: dict
+            Further keyword arguments for 'NeuronalWorld'.
+
+    Returns
+    -------
+        (float, int)
+            The fitness of the network and the number of simulated physic updates.
+    """
+    world = NeuronalWorld(seed, network, **world_settings)
+    world.generatePlatform()
+    while world.update(constants.UPS):
+        pass
+    return world.nn.fitness, world.ticks
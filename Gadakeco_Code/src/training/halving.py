@@ -0,0 +1,102 @@
+"""
+Multi-fidelity evaluation of a generation with successive halving.
+Only the fittest networks are taken into the next generation, so the others don't need to be simulated until the end:
+all networks are simulated for a short horizon, and only the best of them (ranked by their fitness so far) continue
+from where they stopped, with an extended horizon, until the remaining ones are simulated to the end.
+"""
+
+import math
+
+from lib import constants
+
+
+def advance(task):
+    """
+    Simulates the world of 'task' = (world, horizon) until its episode ends or it reached 'horizon' physic updates
+    (None for no limit) and returns the world, so it can be resumed later.
+    """
+    world, horizon = task
+    while (horizon is None or world.ticks < horizon) and world.update(constants.UPS):
+        pass
+    return world
+
+
+class SuccessiveHalvingEvaluator:
+    """
+    Staged evaluator for a generation of 'NeuronalWorld's.
+
+    Methods
+    -------
+        evaluate(self, worlds, elite_count): list[(float, int)]
+            Evaluates the networks of all 'worlds' and returns their fitness and number of simulated physic updates.
+    """
+    def __init__(self, scheduler, first_horizon=100, horizon_factor=3, keep_fraction=0.5):
+        """
+        Parameters
+        ----------
+            scheduler: training.scheduler.EvaluationScheduler
+                Used to run the stages on the process pool.
+            first_horizon: int
+                Number of physic updates all networks are simulated for.
+            horizon_factor: int
+                Factor by which the horizon is extended for each further stage.
+            keep_fraction: float
+                Fraction of the still running networks that continue to the next stage.
+        """
+        self.scheduler = scheduler
+        self.first_horizon = first_horizon
+        self.horizon_factor = horizon_factor
+        self.keep_fraction = keep_fraction
+
+    def evaluate(self, worlds, elite_count):
+        """
+        Evaluates the networks of all 'worlds' in stages. Networks that were stopped early get the fitness they would
+        reach if they didn't earn any more points.
+
+        Parameters
+        ----------
+            worlds: list[NeuronalWorld]
+                The worlds to evaluate (their platform has to be generated already).
+            elite_count: int
+                At least this many networks are simulated until their episode ends.
+
+        Returns
+        -------
+            list[(float, int)]
+                The fitness and the number of simulated physic updates for each world.
+        """
+        worlds = list(worlds)
+        results = [None] * len(worlds)
+        active = list(range(len(worlds)))
+        horizon = self.first_horizon
+
+        while active:
+            # the last stage simulates the remaining networks until the end
+            if len(active) <= elite_count:
+                horizon = None
+
+            tasks = [(worlds[i], horizon) for i in active]
+            estimates = [worlds[i].nn.episode_ticks if horizon is None else min(worlds[i].nn.episode_ticks, horizon)
+                         for i in active]
+            advanced = self.scheduler.map(advance, tasks, estimates)
+
+            running = []
+            for i, world in zip(active, advanced):
+                worlds[i] = world
+                if world.isRunning():
+                    # the fitness still drops with the time, so rank by what's left if no more points are earned
+                    results[i] = (world.projectedFitness(constants.UPS), world.ticks)
+                    running.append(i)
+                else:
+                    results[i] = (world.nn.fitness, world.ticks)
+
+            # only the best networks so far continue (including all that are tied with the last one)
+            running.sort(key=lambda i: results[i][0], reverse=True)
+            keep = min(max(math.ceil(len(running) * self.keep_fraction), elite_count), len(running))
+            while keep < len(running) and results[running[keep]][0] == results[running[keep - 1]][0]:
+                keep += 1
+            active = running[:keep]
+            if horizon is not None:
+                horizon *= self.horizon_factor
+
+        return results
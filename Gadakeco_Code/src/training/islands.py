@@ -0,0 +1,125 @@
+"""
+Island model: several populations evolve in parallel, each inside its own process, without waiting for each other.
+Every few generations each island sends copies of its best networks to the next island (ring topology), which takes
+them in place of its worst networks. The islands share the seed of the world generator, so the fitness of the
+migrants stays comparable.
+"""
+
+import queue
+import time
+from copy import deepcopy
+from multiprocessing import Process, Queue
+
+from lib import constants
+from training.evaluation import evaluate_network
+from training.telemetry import create_record
+
+
+def migrate(population, inbox, outbox, migrant_count):
+    """
+    Sends copies of the best networks of 'population' to 'outbox' and replaces its worst networks with the migrants
+    waiting in 'inbox'. Never blocks: migrants that aren't there yet are taken in at the next migration.
+    The migrants get new ids of 'population' and no parent, as the ids of their home island may be taken here.
+    """
+    ordered = sorted(population.current_generation, key=lambda net: net.fitness, reverse=True)
+    outbox.put(deepcopy(ordered[:migrant_count]))
+
+    migrants = []
+    while True:
+        try:
+            migrants.extend(inbox.get_nowait())
+        except queue.Empty:
+            break
+
+    migrants = sorted(migrants, key=lambda net: net.fitness, reverse=True)[:len(ordered)]
+    for net in migrants:
+        net.network_id = population.new_network_id()
+        net.parent_id = None
+    if migrants:
+        population.current_generation = ordered[:len(ordered) - len(migrants)] + migrants
+
+
+def run_island(index, population, world_settings, migration_interval, migrant_count, inbox, outbox, reports,
+               generations=None):
+    """
+    Evolves 'population' in the current process. Meant to be the target of a 'multiprocessing.Process'.
+
+    Parameters
+    ----------
+        index: int
+            The number of this island.
+        population: Population
+        world_settings: dict
+            Further keyword arguments for 'NeuronalWorld'.
+        migration_interval: int
+            Migrants are exchanged every 'migration_interval' generations.
+        migrant_count: int
+            The number of networks sent to the next island.
+        inbox, outbox: multiprocessing.Queue
+            Migration channels from the previous and to the next island.
+        reports: multiprocessing.Queue
+            (index, generation, best fitness, telemetry record) is put here after each generation.
+        generations: int
+            Number of generations to evolve, None for no limit.
+    """
+    # don't wait for the next island to take the last migrants when this one is done
+    outbox.cancel_join_thread()
+
+    evolved = 0
+    while generations is None or evolved < generations:
+        start = time.time()
+        for net in population.current_generation:
+            net.fitness, net.episode_ticks = evaluate_network(net, population.seed, world_settings)
+        record = create_record(population, time.time() - start)
+        record["island"] = index
+
+        population.save_to_file(constants.res_loc("networks") + population.name + ".pop")
+        reports.put((index, population.generation_count, max(net.fitness for net in population.current_generation),
+                     record))
+
+        if population.generation_count % migration_interval == 0:
+            migrate(population, inbox, outbox, migrant_count)
+
+        population.create_next_generation()
+        population.generation_count += 1
+        evolved += 1
+
+
+def run_islands(populations, world_settings, migration_interval=5, migrant_count=2, generations=None,
+                telemetry=None):
+    """
+    Evolves each of the 'populations' on its own island (process) and prints their progress.
+    Returns when all islands evolved 'generations' generations (None for no limit).
+    The record of every island generation is written to the TelemetryWriter 'telemetry', if given.
+    """
+    channels = [Queue() for _ in populations]
+    reports = Queue()
+    islands = [Process(target=run_island,
+                       args=(i, pop, world_settings, migration_interval, migrant_count, channels[i],
+                             channels[(i + 1) % len(populations)], reports, generations), daemon=True)
+               for i, pop in enumerate(populations)]
+    for island in islands:
+        island.start()
+
+    while any(island.is_alive() for island in islands):
+        try:
+            index, generation, best_fitness, record = reports.get(timeout=1.0)
+        except queue.Empty:
+            continue
+        print("island {} generation {} best fitness: {}".format(index, generation, best_fitness))
+        if telemetry is not None:
+            telemetry.write(record)
+
+    for island in islands:
+        island.join()
+
+
+def create_populations(count, population):
+    # copies of 'population' for 'count' islands, they drift apart as each island has its own random generators
+    populations = []
+    for i in range(count):
+        pop = deepcopy(population)
+        pop.name += "-island{}".format(i)
+        pop.set_rng_stream("{}island{}".format(population.rng_stream, i))
+        populations.append(pop)
+    return populations
@@ -0,0 +1,192 @@
+"""
+Memory growth of a training run, reported at generation boundaries.
+The memory traced by 'tracemalloc' is attributed to subsystems by the source file that allocated it: the innermost
+frame of the allocation's traceback that belongs to the game, so e.g. a network copied by 'copy.deepcopy' in
+neat/population.py counts for the genomes. Networks are copied recursively along their edges, usually deeper than the
+stored tracebacks reach, so allocations made only by the 'copy' module count for the genomes as well. Pixel data of
+pygame surfaces isn't allocated by Python and not traced, it is estimated from the surfaces of the renderers instead
+(see 'surface_bytes').
+Tracing allocations slows the simulation down noticeably, so the tracker is opt-in.
+"""
+
+import copy
+import copyreg
+import os
+import sys
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+# the subsystems with the source files or directories (relative to src) that belong to them
+SUBSYSTEMS = (
+    ("genomes", ("neat",)),
+    ("world", ("world.py", "entity", "worldgeneration", "aabb.py", "camera.py")),
+    ("renderers", ("render", "gui", "context", os.path.join("util", "texturehandler.py"))),
+    ("training", ("training",)),
+)
+
+_SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# allocations whose traceback only contains these files are deep copies of networks
+_COPY_FILES = {os.path.abspath(copy.__file__), os.path.abspath(copyreg.__file__)}
+
+
+def _subsystem(filename):
+    # the subsystem of a source file, None for files that don't belong to the game
+    path = os.path.relpath(os.path.abspath(filename), _SOURCE_DIR)
+    if path.startswith(os.pardir):
+        return None
+    for name, paths in SUBSYSTEMS:
+        for prefix in paths:
+            if path == prefix or path.startswith(prefix + os.sep):
+                return name
+    return "other"
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in bytes (None where the 'resource' module is missing).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def surface_bytes(objects):
+    """
+    Estimates the pixel memory of the pygame surfaces that are attributes of 'objects' (e.g. renderers), directly or
+    in a tuple, list or dict; surfaces shared by several objects are counted once.
+    """
+    seen = set()
+    total = 0
+    for obj in objects:
+        for value in vars(obj).values():
+            if isinstance(value, dict):
+                value = list(value.values())
+            for surface in value if isinstance(value, (tuple, list)) else (value,):
+                if hasattr(surface, "get_bytesize") and id(surface) not in seen:
+                    seen.add(id(surface))
+                    total += surface.get_bytesize() * surface.get_width() * surface.get_height()
+    return total
+
+
+def start(frames=10):
+    """
+    Starts tracing the allocations, if they aren't traced yet (call it before loading a population, so its networks
+    are traced as well).
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+class MemoryTracker:
+    """
+    Takes a 'tracemalloc' snapshot at each generation boundary and reports the traced memory of every subsystem and
+    its growth since the last and the first snapshot.
+
+    Methods
+    -------
+        report(self, extra=None): dict
+            Takes a snapshot and returns the memory report (for the telemetry, see training.telemetry).
+        check(self, report): str
+            Returns a warning if the memory limit is exceeded, None otherwise.
+        stop(self):
+            Stops tracing the allocations.
+    """
+    def __init__(self, frames=10, limit=None):
+        """
+        Parameters
+        ----------
+            frames: int
+                Number of frames stored for each allocation, allocations deeper below the game's code than this are
+                counted as "other".
+            limit: int
+                Peak resident set size in bytes (of this process or any worker) at which 'check' warns.
+        """
+        self.limit = limit
+        start(frames)
+        self._first = None
+        self._last = None
+
+    def _group(self, snapshot):
+        sizes = {name: 0 for name, _ in SUBSYSTEMS}
+        sizes["other"] = 0
+        # the traceback is ordered from the oldest to the most recent frame
+        for statistic in snapshot.statistics("traceback"):
+            name = None
+            for frame in reversed(statistic.traceback):
+                name = _subsystem(frame.filename)
+                if name is not None:
+                    break
+            if name is None:
+                copied = all(os.path.abspath(frame.filename) in _COPY_FILES for frame in statistic.traceback)
+                name = "genomes" if copied else "other"
+            sizes[name] += statistic.size
+        return sizes
+
+    def report(self, extra=None):
+        """
+        Parameters
+        ----------
+            extra: dict
+                Further values for the report, e.g. the estimated surface memory or the peak RSS of the workers.
+
+        Returns
+        -------
+            dict
+                The traced bytes of each subsystem, their growth since the last and the first report, the traced
+                total with its peak and the peak RSS of this process.
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        sizes = self._group(snapshot)
+        if self._first is None:
+            self._first = sizes
+        last = self._last or sizes
+        self._last = sizes
+
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        report = {
+            "traced": traced,
+            "traced_peak": traced_peak,
+            "subsystems": sizes,
+            "growth": {name: size - last[name] for name, size in sizes.items()},
+            "total_growth": {name: size - self._first[name] for name, size in sizes.items()},
+            "peak_rss": peak_rss(),
+        }
+        report.update(extra or {})
+        # the peak of the traced memory is reported per generation
+        tracemalloc.reset_peak()
+        return report
+
+    def check(self, report):
+        if self.limit is None:
+            return None
+        peaks = [report["peak_rss"]] + list(report.get("worker_peak_rss") or [])
+        peak = max((rss for rss in peaks if rss is not None), default=0)
+        if peak < self.limit:
+            return None
+        growing = max(report["total_growth"], key=report["total_growth"].get)
+        return "peak RSS of {:.0f} MB exceeds the limit of {:.0f} MB, fastest growing: {} (+{:.1f} MB)".format(
+            peak / 2 ** 20, self.limit / 2 ** 20, growing, report["total_growth"][growing] / 2 ** 20)
+
+    def stop(self):
+        tracemalloc.stop()
+
+
+def format_report(report):
+    # one line summary of a memory report
+    parts = ["{} {:.1f} MB ({:+.1f})".format(name, size / 2 ** 20, report["growth"][name] / 2 ** 20)
+             for name, size in report["subsystems"].items()]
+    if report.get("surface_bytes") is not None:
+        parts.append("surfaces ~{:.1f} MB".format(report["surface_bytes"] / 2 ** 20))
+    if report["peak_rss"] is not None:
+        parts.append("peak RSS {:.0f} MB".format(report["peak_rss"] / 2 ** 20))
+    return "memory: " + ", ".join(parts)
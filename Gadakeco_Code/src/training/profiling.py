@@ -0,0 +1,169 @@
+"""
+Profiling of the evaluations inside the worker processes.
+The parent of a process pool only waits for results, so profiling it shows nothing of the simulation. Instead every
+worker profiles the batches it evaluates and sends the statistics back with the results (see training.scheduler),
+where they are merged into one 'pstats.Stats' per generation.
+
+Two modes are available:
+    "cprofile": deterministic profiling with 'cProfile', exact call counts but a high overhead;
+    "sampling": the stack of the worker is sampled every few milliseconds by a thread, the overhead is low enough for
+                long runs; each sample counts for the time since the previous one and the "calls" are numbers of
+                samples.
+"""
+
+import cProfile
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# the profiler of this process, None while profiling is disabled
+_profiler = None
+
+
+class _StatsData:
+    # 'pstats.Stats' loads statistics from objects that have 'create_stats' and 'stats'
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class _DeterministicProfiler:
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def enable(self):
+        self._profile.enable()
+
+    def disable(self):
+        self._profile.disable()
+
+    def collect(self):
+        profile, self._profile = self._profile, cProfile.Profile()
+        profile.create_stats()
+        return profile.stats
+
+
+class _SamplingProfiler:
+    def __init__(self, interval):
+        self.interval = interval
+        # [number of samples, sampled time] of each stack (from the outermost to the innermost function)
+        self._samples = {}
+        self._active = False
+        self._lock = threading.Lock()
+        self._thread_id = threading.get_ident()
+        threading.Thread(target=self._sample, daemon=True).start()
+
+    def enable(self):
+        self._thread_id = threading.get_ident()
+        self._active = True
+
+    def disable(self):
+        self._active = False
+
+    def _sample(self):
+        last = time.perf_counter()
+        while True:
+            time.sleep(self.interval)
+            # the thread doesn't get the GIL at exact intervals, so a sample stands for the time since the last one
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            if not self._active:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            with self._lock:
+                sample = self._samples.setdefault(tuple(reversed(stack)), [0, 0.0])
+                sample[0] += 1
+                sample[1] += elapsed
+
+    def collect(self):
+        with self._lock:
+            samples, self._samples = self._samples, {}
+
+        # entries like cProfile's: (primitive calls, calls, own time, cumulative time, callers)
+        stats = {}
+        for stack, (count, duration) in samples.items():
+            seen = set()
+            for depth, function in enumerate(stack):
+                entry = stats.setdefault(function, [0, 0, 0.0, 0.0, {}])
+                own = duration if depth == len(stack) - 1 else 0.0
+                entry[2] += own
+                # recursive functions are only counted once per sample
+                if function in seen:
+                    continue
+                seen.add(function)
+                entry[0] += count
+                entry[1] += count
+                entry[3] += duration
+                if depth > 0:
+                    caller = entry[4].setdefault(stack[depth - 1], [0, 0, 0.0, 0.0])
+                    caller[0] += count
+                    caller[1] += count
+                    caller[2] += own
+                    caller[3] += duration
+        return {function: (cc, nc, tt, ct, {caller: tuple(values) for caller, values in callers.items()})
+                for function, (cc, nc, tt, ct, callers) in stats.items()}
+
+
+def start(mode="cprofile", interval=0.005):
+    """
+    Enables profiling in this process (can be used as initializer of a process pool).
+
+    Parameters
+    ----------
+        mode: str
+            "cprofile" or "sampling".
+        interval: float
+            Seconds between two samples in the sampling mode.
+    """
+    global _profiler
+    if mode == "sampling":
+        _profiler = _SamplingProfiler(interval)
+    else:
+        _profiler = _DeterministicProfiler()
+
+
+@contextmanager
+def profiled():
+    # profiles the code in the with-block if profiling is enabled
+    if _profiler is None:
+        yield
+        return
+    _profiler.enable()
+    try:
+        yield
+    finally:
+        _profiler.disable()
+
+
+def collect():
+    """
+    Returns the statistics of this process since the last call as a dict in the format of 'pstats' (None if
+    profiling is disabled).
+    """
+    if _profiler is None:
+        return None
+    return _profiler.collect()
+
+
+def merge(stats_list):
+    """
+    Merges the statistics of several processes (see 'collect') into one 'pstats.Stats', None if there aren't any.
+    """
+    merged = None
+    for stats in stats_list:
+        if not stats:
+            continue
+        if merged is None:
+            merged = pstats.Stats(_StatsData(stats))
+        else:
+            merged.add(_StatsData(stats))
+    return merged
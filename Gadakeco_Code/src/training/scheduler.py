@@ -0,0 +1,177 @@
+"""
+Scheduling of evaluations on a process pool.
+Episode lengths vary by orders of magnitude (most networks die within seconds, a few run for a long time), so fixed
+chunks leave workers idle while the last ones finish their stragglers.
+"""
+
+import os
+import time
+from functools import partial
+from multiprocessing import TimeoutError
+
+from training import profiling
+from training.memory import peak_rss
+from util import instrumentation
+from util.instrumentation import PhaseTimer
+
+
+def _run_batch(func, batch):
+    # Runs in the worker process: evaluates every item of the batch and keeps track of its index.
+    # Along with the results, a report of the worker is sent back: the time it was busy, its peak memory, and the phase
+    # times and the profile of the batch if instrumentation or profiling are enabled in the worker.
+    start = time.perf_counter()
+    with profiling.profiled():
+        results = [(index, func(item)) for index, item in batch]
+    report = {
+        "busy_time": time.perf_counter() - start,
+        "timer": instrumentation.collect(),
+        "profile": profiling.collect(),
+        "pid": os.getpid(),
+        "peak_rss": peak_rss(),
+    }
+    return results, report
+
+
+class EvaluationScheduler:
+    """
+    Distributes evaluation tasks over a 'multiprocessing.Pool' with the longest expected tasks first.
+
+    Expensive tasks are submitted one by one, cheap tasks are batched together, so that every batch costs roughly
+    the same. The results are streamed back with 'imap_unordered', so a worker picks up the next batch as soon as it
+    is done.
+
+    Methods
+    -------
+        map(self, func, items, estimates, stop=None): list
+            Applies 'func' to all 'items' in the pool and returns the results in the order of 'items'.
+        collect_timer(self): PhaseTimer
+            Returns the phase times of all workers since the last call (None without instrumentation).
+        collect_busy_time(self): float
+            Returns the seconds the workers spent on tasks since the last call, summed over all workers.
+        collect_profile(self): pstats.Stats
+            Returns the merged profile of all workers since the last call (None without profiling).
+        get_peak_rss(self): list[int]
+            Returns the peak resident set size in bytes of each worker that reported one.
+    """
+    def __init__(self, pool, number_of_workers, granularity=4):
+        """
+        Parameters
+        ----------
+            pool: multiprocessing.Pool
+                The pool the tasks are submitted to.
+            number_of_workers: int
+                The number of processes of 'pool'.
+            granularity: int
+                The number of batches each worker should get on average; more batches balance better but cost more
+                communication.
+        """
+        self.pool = pool
+        self.number_of_workers = number_of_workers
+        self.granularity = granularity
+        # phase times sent back by the workers (see util.instrumentation)
+        self.timer = None
+        self.busy_time = 0.0
+        # profiles sent back by the workers (see training.profiling)
+        self.profiles = []
+        # the peak resident set size of each worker by its process id
+        self.peak_rss = {}
+
+    def create_batches(self, estimates):
+        """
+        Groups the indices of the tasks into batches of roughly the same expected cost, ordered longest-first.
+
+        Parameters
+        ----------
+            estimates: list[float]
+                The expected cost of each task (e.g. the episode length of the parent network); values <= 0 mean
+                that nothing is known about the task.
+
+        Returns
+        -------
+            list[list[int]]
+                The batches, each given by the indices of its tasks.
+        """
+        known = [estimate for estimate in estimates if estimate > 0]
+        default = sum(known) / len(known) if known else 1
+        estimates = [estimate if estimate > 0 else default for estimate in estimates]
+
+        # Every batch should cost about this much, so all workers finish at roughly the same time.
+        target = sum(estimates) / (self.number_of_workers * self.granularity)
+
+        batches = []
+        cheap_batch = []
+        cheap_cost = 0
+        for index in sorted(range(len(estimates)), key=lambda i: estimates[i], reverse=True):
+            if estimates[index] >= target:
+                batches.append([index])
+                continue
+
+            cheap_batch.append(index)
+            cheap_cost += estimates[index]
+            if cheap_cost >= target:
+                batches.append(cheap_batch)
+                cheap_batch = []
+                cheap_cost = 0
+
+        if cheap_batch:
+            batches.append(cheap_batch)
+        return batches
+
+    def map(self, func, items, estimates, stop=None):
+        """
+        Applies 'func' to all 'items' in the pool.
+
+        Parameters
+        ----------
+            func: callable
+                A function defined at module level (it has to be pickled to the workers).
+            items: list
+                The arguments for 'func'.
+            estimates: list[float]
+                The expected cost for each item, see 'create_batches'.
+            stop: threading.Event
+                When it is set, the results that are still missing are abandoned (e.g. to terminate the pool from
+                another thread, which never completes them).
+
+        Returns
+        -------
+            list
+                The results of 'func' in the order of 'items', None if 'stop' was set before all of them arrived.
+        """
+        batches = [[(index, items[index]) for index in batch] for batch in self.create_batches(estimates)]
+
+        results = [None] * len(items)
+        iterator = self.pool.imap_unordered(partial(_run_batch, func), batches, chunksize=1)
+        for _ in batches:
+            while True:
+                try:
+                    batch_results, report = iterator.next(timeout=None if stop is None else 0.1)
+                    break
+                except TimeoutError:
+                    if stop.is_set():
+                        return None
+            for index, result in batch_results:
+                results[index] = result
+            self.busy_time += report["busy_time"]
+            if report["timer"] is not None:
+                self.timer = (self.timer or PhaseTimer()).merge(report["timer"])
+            if report["profile"] is not None:
+                self.profiles.append(report["profile"])
+            if report["peak_rss"] is not None:
+                self.peak_rss[report["pid"]] = report["peak_rss"]
+        return results
+
+    def collect_timer(self):
+        timer, self.timer = self.timer, None
+        return timer
+
+    def collect_busy_time(self):
+        busy_time, self.busy_time = self.busy_time, 0.0
+        return busy_time
+
+    def collect_profile(self):
+        profiles, self.profiles = self.profiles, []
+        return profiling.merge(profiles)
+
+    def get_peak_rss(self):
+        return [self.peak_rss[pid] for pid in sorted(self.peak_rss)]
@@ -0,0 +1,133 @@
+"""
+Steady-state evolution: instead of replacing a whole generation at once, a new network is created as soon as any
+evaluation finishes. The population is a ranked pool of fixed size, every evaluated network takes its place in the
+ranking and pushes out the worst one. No worker ever waits for the slowest network of a generation.
+"""
+
+import bisect
+import queue
+import time
+
+from lib import constants
+from training.evaluation import evaluate_network
+from training.telemetry import create_record
+
+
+class SteadyStateDriver:
+    """
+    Evolves a 'Population' asynchronously on a 'multiprocessing.Pool'.
+
+    The parents are chosen from the rolling elite (the 'Population.elite_count' best networks of the ranked pool),
+    their children get the same mix of mutations as in 'Population.create_next_generation': 8 of 9 by adding an
+    edge, 1 of 9 by adding a node.
+
+    Methods
+    -------
+        run(self, evaluations=None):
+            Evolves the population until 'evaluations' networks were evaluated (None for no limit).
+        create_child(self): Network
+            Mutates a copy of a random network of the rolling elite.
+    """
+    def __init__(self, pool, number_of_workers, population, world_settings, tasks_per_worker=2, telemetry=None):
+        """
+        Parameters
+        ----------
+            pool: multiprocessing.Pool
+                The pool the evaluations are submitted to.
+            number_of_workers: int
+                The number of processes of 'pool'.
+            population: Population
+                Its 'current_generation' is the initial pool, it is replaced by the ranked pool at every report.
+            world_settings: dict
+                Further keyword arguments for 'NeuronalWorld'.
+            tasks_per_worker: int
+                Number of evaluations kept in flight per worker, so a worker never waits for the next task.
+            telemetry: TelemetryWriter
+                A record of the ranked pool is written to it at every report (see training.telemetry).
+        """
+        self.pool = pool
+        self.population = population
+        self.world_settings = world_settings
+        self.max_in_flight = number_of_workers * tasks_per_worker
+        self.telemetry = telemetry
+
+        # the ranked pool, best first; 'keys' holds the negated fitness for bisect
+        self.ranked = []
+        self.keys = []
+        self._results = queue.Queue()
+
+    def create_child(self):
+        elite = self.ranked[:max(self.population.elite_count(len(self.ranked)), 1)]
+        rng = self.population.rng
+        return self.population.create_child(rng.choice(elite), node_mutation=rng.randrange(9) == 0)
+
+    def insert(self, network):
+        # the new network goes in front of networks with the same fitness, so the pool keeps drifting
+        index = bisect.bisect_left(self.keys, -network.fitness)
+        self.keys.insert(index, -network.fitness)
+        self.ranked.insert(index, network)
+        if len(self.ranked) > self.population.size:
+            self.keys.pop()
+            self.ranked.pop()
+
+    def submit(self, network):
+        self.pool.apply_async(evaluate_network, (network, self.population.seed, self.world_settings),
+                              callback=lambda result: self._results.put((network, result)),
+                              error_callback=lambda error: self._results.put((network, error)))
+
+    def run(self, evaluations=None):
+        """
+        Evolves the population. After every 'population.size' evaluations the ranked pool is saved as the current
+        generation of the population, the throughput is printed and the telemetry record is written.
+
+        Parameters
+        ----------
+            evaluations: int
+                Number of evaluations after which the driver returns, None for no limit.
+        """
+        # the networks of the initial population are evaluated first, then children take their place in the queue
+        initial = list(self.population.current_generation)
+        in_flight = 0
+        evaluated = 0
+        report_evaluations = 0
+        report_ticks = 0
+        report_time = time.time()
+
+        while evaluations is None or evaluated < evaluations:
+            while in_flight < self.max_in_flight and (evaluations is None or evaluated + in_flight < evaluations):
+                if initial:
+                    self.submit(initial.pop(0))
+                elif self.ranked:
+                    self.submit(self.create_child())
+                else:
+                    break
+                in_flight += 1
+
+            network, result = self._results.get()
+            in_flight -= 1
+            if isinstance(result, BaseException):
+                raise result
+            network.fitness, network.episode_ticks = result
+            self.insert(network)
+            evaluated += 1
+            report_ticks += network.episode_ticks
+
+            if evaluated - report_evaluations >= self.population.size:
+                now = time.time()
+                self.report(evaluated, evaluated - report_evaluations, now - report_time, report_ticks)
+                report_evaluations = evaluated
+                report_ticks = 0
+                report_time = now
+
+        self.population.current_generation = list(self.ranked)
+
+    def report(self, evaluated, evaluations, evaluation_time, simulated_ticks):
+        # a 'generation' of the steady-state population are 'size' evaluations, the record describes the ranked pool
+        # and the evaluations since the last report
+        self.population.current_generation = list(self.ranked)
+        self.population.save_to_file(constants.res_loc("networks") + self.population.name + ".pop")
+        print("evaluations {} best fitness: {} ({:.1f} evaluations/s)".format(
+            evaluated, self.ranked[0].fitness, evaluations / evaluation_time))
+        if self.telemetry is not None:
+            self.telemetry.write(create_record(self.population, evaluation_time, simulated_ticks))
+        self.population.generation_count += 1
@@ -0,0 +1,154 @@
+"""
+Telemetry of a training run: one record per generation, appended to a JSON lines (.jsonl) or CSV (.csv) file and
+flushed right away, so the file can be followed (e.g. with 'tail -f') while the training is running.
+CSV files have the fixed columns CSV_COLUMNS, values a record doesn't have stay empty.
+"""
+
+import csv
+import json
+import os
+import statistics
+import time
+
+from training.memory import SUBSYSTEMS
+from util.instrumentation import PHASES
+
+
+def _distribution(values):
+    # summary of a list of numbers
+    values = sorted(values)
+    return {
+        "mean": statistics.mean(values),
+        "median": statistics.median(values),
+        "p90": values[min(int(0.9 * len(values)), len(values) - 1)],
+        "min": values[0],
+        "max": values[-1],
+    }
+
+
+def _flatten(record, prefix=""):
+    # {"a": {"b": 1}} -> {"a.b": 1}
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, prefix + key + "."))
+        else:
+            flat[prefix + key] = value
+    return flat
+
+
+def _csv_columns():
+    # the flattened keys of all values a record can have (see create_record)
+    distribution = ("mean", "median", "p90", "min", "max")
+    columns = ["generation", "island", "timestamp", "networks", "evaluation_time", "simulated_ticks",
+               "ticks_per_second"]
+    for name in ("fitness", "episode_ticks", "hidden_nodes", "edges"):
+        columns += [name + "." + key for key in distribution]
+    columns += ["worker_utilization", "cache_hit_rate.trajectory"]
+    columns += ["phases." + phase for phase in PHASES]
+
+    subsystems = [name for name, _ in SUBSYSTEMS] + ["other"]
+    columns += ["memory.traced", "memory.traced_peak"]
+    for group in ("subsystems", "growth", "total_growth"):
+        columns += ["memory.{}.{}".format(group, name) for name in subsystems]
+    columns += ["memory.peak_rss", "memory.worker_peak_rss", "memory.surface_bytes", "memory.static_entities"]
+    return columns
+
+
+CSV_COLUMNS = _csv_columns()
+
+
+def create_record(population, evaluation_time, simulated_ticks=None, utilization=None, cache=None, timer=None,
+                  memory=None):
+    """
+    Collects the statistics of the evaluated current generation of 'population'.
+
+    Parameters
+    ----------
+        population: Population
+            Its networks need their fitness and episode length of this generation.
+        evaluation_time: float
+            Wall-clock seconds the evaluation of the generation took.
+        simulated_ticks: int
+            Number of physic updates that were actually simulated, by default the sum of the episode lengths.
+        utilization: float
+            Fraction of the time the workers were busy.
+        cache: dict
+            Hit rates of the caches that were used for the evaluation, e.g. {"trajectory": 0.4}.
+        timer: util.instrumentation.PhaseTimer
+            The phase times of the simulation, if instrumented.
+        memory: dict
+            The memory report of the generation, if tracked (see training.memory).
+
+    Returns
+    -------
+        dict
+            The record, with nested dicts for grouped values (the island model adds the number of the island).
+    """
+    networks = population.current_generation
+    episode_ticks = [net.episode_ticks for net in networks]
+    if simulated_ticks is None:
+        simulated_ticks = sum(episode_ticks)
+
+    record = {
+        "generation": population.generation_count,
+        "timestamp": time.time(),
+        "networks": len(networks),
+        "evaluation_time": evaluation_time,
+        "simulated_ticks": simulated_ticks,
+        "ticks_per_second": simulated_ticks / evaluation_time if evaluation_time > 0 else None,
+        "fitness": _distribution([net.fitness for net in networks]),
+        "episode_ticks": _distribution(episode_ticks),
+        # nodes 0-488 are the input and output nodes
+        "hidden_nodes": _distribution([len(net.nodes) - 489 for net in networks]),
+        "edges": _distribution([len(net.edges) for net in networks]),
+        "worker_utilization": utilization,
+        "cache_hit_rate": cache or {},
+    }
+    if timer is not None:
+        record["phases"] = {phase: times["time"] for phase, times in timer.asDict().items()}
+    if memory is not None:
+        record["memory"] = memory
+    return record
+
+
+class TelemetryWriter:
+    """
+    Appends records to a telemetry file, the format is chosen by its extension (".csv" or JSON lines otherwise).
+    An existing CSV file is only continued if it has the columns CSV_COLUMNS, otherwise a ValueError is raised.
+
+    Methods
+    -------
+        write(self, record):
+            Appends 'record' to the file and flushes it.
+        close(self):
+            Closes the file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.csv = path.lower().endswith(".csv")
+        # CSV files get a header, unless a run is continued in an existing file
+        header = self.csv and not (os.path.exists(path) and os.path.getsize(path) > 0)
+        if self.csv and not header:
+            with open(path, newline="") as file:
+                columns = next(csv.reader(file), [])
+            if columns != CSV_COLUMNS:
+                raise ValueError("'{}' has different columns than the telemetry records, use a new file".format(path))
+        self._file = open(path, "a", newline="" if self.csv else None)
+        self._writer = None
+        if self.csv:
+            # (a value without a column raises a ValueError instead of being dropped)
+            self._writer = csv.DictWriter(self._file, fieldnames=CSV_COLUMNS)
+            if header:
+                self._writer.writeheader()
+                self._file.flush()
+
+    def write(self, record):
+        if self.csv:
+            self._writer.writerow(_flatten(record))
+        else:
+            self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
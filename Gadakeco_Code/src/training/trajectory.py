@@ -0,0 +1,216 @@
+"""
+Trajectory reuse: a mutated network behaves exactly like its parent until its new structure changes an action for the
+first time, until then its episode is a copy of the parent's one.
+The episode of a parent is recorded (the minimap and the action of every decision and periodic snapshots of the world).
+Each child only evaluates its network on the recorded minimaps until an action differs and continues with the last
+snapshot before that decision. Children that never act differently get the fitness of their parent without simulating
+any physics.
+"""
+
+import bisect
+import math
+from array import array
+
+from lib import constants
+from world import NeuronalWorld
+
+
+class TrajectoryRecorder:
+    """
+    Records the episode of a 'NeuronalWorld' (set as its 'recorder').
+    """
+    def __init__(self, snapshot_interval=50):
+        """
+        Parameters
+        ----------
+            snapshot_interval: int
+                Number of physic updates between two snapshots of the world.
+        """
+        self.snapshot_interval = snapshot_interval
+        # (minimap, fitness, action) for each query of the network
+        self.decisions = []
+        # (number of decisions before, world) in the order of the episode
+        self.snapshots = []
+
+    def decision(self, world, action):
+        # before the first physic update the fitness isn't set by the world, it's the one the network came with
+        fitness = world.nn.get_fitness() if world.ticks > 0 else None
+        self.decisions.append((array('b', world.minimapValues), fitness, tuple(action)))
+
+    def tick(self, world):
+        if world.ticks % self.snapshot_interval == 0:
+            self.snapshots.append((len(self.decisions), world.snapshot()))
+
+    def find_divergence(self, network):
+        """
+        Returns the index of the first decision at which 'network' acts differently, None if it never does.
+        """
+        initial_fitness = network.get_fitness()
+        try:
+            for index, (minimap, fitness, action) in enumerate(self.decisions):
+                network.fitness = initial_fitness if fitness is None else fitness
+                if tuple(network.evaluate(minimap.tolist())) != action:
+                    return index
+            return None
+        finally:
+            network.fitness = initial_fitness
+
+    def find_snapshot(self, decision_index):
+        """
+        Returns the last snapshot that was taken before the decision 'decision_index', None for the start.
+        """
+        position = bisect.bisect_right([decisions for decisions, _ in self.snapshots], decision_index)
+        return self.snapshots[position - 1][1] if position > 0 else None
+
+
+def _simulate(world):
+    start = world.ticks
+    while world.update(constants.UPS):
+        pass
+    return (world.nn.fitness, world.ticks), world.ticks - start
+
+
+def evaluate_family(task):
+    """
+    Evaluates a parent network with recording and its 'children' with the recorded episode.
+
+    Parameters
+    ----------
+        task: (int, dict, Network, list[Network], int)
+            The seed of the world generator, further keyword arguments for 'NeuronalWorld', the parent, its children
+            and the number of physic updates between two snapshots.
+
+    Returns
+    -------
+        ((float, int), list[(float, int)], int, int)
+            The fitness and the episode length of the parent and of each child, the number of physic updates that
+            were actually simulated and the number of children that never acted differently.
+    """
+    seed, world_settings, parent, children, snapshot_interval = task
+
+    world = NeuronalWorld(seed, parent, **world_settings)
+    world.generatePlatform()
+    if children:
+        world.recorder = TrajectoryRecorder(snapshot_interval)
+    parent_result, simulated = _simulate(world)
+    recorder = world.recorder
+
+    child_results = []
+    reused = 0
+    for child in children:
+        divergence = recorder.find_divergence(child)
+        if divergence is None:
+            child_results.append(parent_result)
+            reused += 1
+            continue
+
+        snapshot = recorder.find_snapshot(divergence)
+        if snapshot is None:
+            world = NeuronalWorld(seed, child, **world_settings)
+            world.generatePlatform()
+        else:
+            world = snapshot.snapshot(child)
+        result, ticks = _simulate(world)
+        child_results.append(result)
+        simulated += ticks
+
+    return parent_result, child_results, simulated, reused
+
+
+class TrajectoryReuseEvaluator:
+    """
+    Evaluates a generation by families: the networks that have children in the generation are evaluated with recording,
+    their children with the recorded episode (see 'evaluate_family').
+
+    Methods
+    -------
+        evaluate(self, networks, seed, world_settings): list[(float, int)]
+            Evaluates all 'networks' and returns their fitness and episode length.
+    """
+    def __init__(self, scheduler, snapshot_interval=50):
+        """
+        Parameters
+        ----------
+            scheduler: training.scheduler.EvaluationScheduler
+                Used to run the families on the process pool.
+            snapshot_interval: int
+                Number of physic updates between two snapshots of a recorded episode.
+        """
+        self.scheduler = scheduler
+        self.snapshot_interval = snapshot_interval
+        # number of physic updates of the last generation: (simulated, episode lengths in total)
+        self.last_ticks = (0, 0)
+        # number of children of the last generation: (never acted differently, evaluated with a recorded episode)
+        self.last_reused = (0, 0)
+
+    def create_families(self, networks):
+        """
+        Groups the indices of 'networks' by their parent.
+
+        Returns
+        -------
+            list[(int, list[int])]
+                The index of each parent with the indices of its children; networks whose parent isn't in the
+                generation are parents without children.
+        """
+        indices = {net.network_id: i for i, net in enumerate(networks) if net.network_id is not None}
+        children = {}
+        for i, net in enumerate(networks):
+            if net.parent_id in indices and indices[net.parent_id] != i:
+                children.setdefault(indices[net.parent_id], []).append(i)
+
+        families = []
+        for i, net in enumerate(networks):
+            parent = indices.get(net.parent_id)
+            # networks with children of their own are evaluated with recording even if their parent is there as well
+            if i in children or parent is None or parent == i:
+                families.append((i, [child for child in children.get(i, []) if child not in children]))
+        return families
+
+    def evaluate(self, networks, seed, world_settings):
+        """
+        Evaluates all 'networks' in worlds generated from 'seed'.
+
+        Parameters
+        ----------
+            networks: list[Network]
+            seed: int
+                The seed of the world generator.
+            world_settings: dict
+                Further keyword arguments for 'NeuronalWorld'.
+
+        Returns
+        -------
+            list[(float, int)]
+                The fitness and the episode length for each network.
+        """
+        tasks = []
+        members = []
+        estimates = []
+        # split the families, so there are enough tasks for all workers (each part records the parent again)
+        families = self.create_families(networks)
+        parts = math.ceil(self.scheduler.number_of_workers * self.scheduler.granularity / max(len(families), 1))
+        for parent, children in families:
+            size = max(math.ceil(len(children) / parts), 1)
+            for start in range(0, max(len(children), 1), size):
+                part = children[start:start + size]
+                tasks.append((seed, world_settings, networks[parent], [networks[i] for i in part],
+                              self.snapshot_interval))
+                members.append((parent if start == 0 else None, part))
+                estimates.append(sum(networks[i].episode_ticks for i in [parent] + part))
+
+        results = [None] * len(networks)
+        simulated = 0
+        reused = 0
+        for (parent, part), (parent_result, child_results, ticks, part_reused) in zip(
+                members, self.scheduler.map(evaluate_family, tasks, estimates)):
+            if parent is not None:
+                results[parent] = parent_result
+            for i, result in zip(part, child_results):
+                results[i] = result
+            simulated += ticks
+            reused += part_reused
+
+        self.last_ticks = (simulated, sum(ticks for _, ticks in results))
+        self.last_reused = (reused, sum(len(part) for _, part in members))
+        return results
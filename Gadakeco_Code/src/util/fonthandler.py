@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+from pygame.font import SysFont
+
+# the fonts by (name, size, bold, italic)
+_fonts = {}
+
+
+def getFont(name, size, bold=False, italic=False):
+    """
+    returns the system font, it's only created once
+    """
+    key = (name, size, bold, italic)
+    font = _fonts.get(key)
+    if font is None:
+        font = SysFont(name, size, bold=bold, italic=italic)
+        _fonts[key] = font
+    return font
+
+
+class TextCache:
+    """
+    least recently used cache of rendered texts, so texts that stay the same over several frames are only rendered once
+    (the surfaces are shared, they must not be drawn on)
+    """
+
+    def __init__(self, maxEntries):
+        self.maxEntries = maxEntries
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.maxEntries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+# the rendered texts of the hud and the gui
+textCache = TextCache(2048)
+
+
+def renderText(font, text, color, antialias=True):
+    """
+    the rendered text (shared, see TextCache)
+    """
+    return textCache.render(font, text, color, antialias)
@@ -0,0 +1,69 @@
+from time import perf_counter
+
+# the timer of this process, None while the instrumentation is disabled
+timer = None
+# the phases the simulation is timed in (see World.update and NeuronalWorld)
+PHASES = ("visibility", "move", "collision", "camera", "worldgen", "input", "minimap", "network", "episode")
+
+
+class PhaseTimer:
+    """
+    cumulative time and number of calls for each phase of the simulation
+    """
+
+    def __init__(self):
+        self.times = {}
+        self.calls = {}
+        self._last = perf_counter()
+
+    def start(self):
+        self._last = perf_counter()
+
+    def lap(self, phase):
+        # adds the time since the last 'start' or 'lap' to 'phase'
+        now = perf_counter()
+        self.times[phase] = self.times.get(phase, 0.0) + now - self._last
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+        self._last = now
+
+    def merge(self, other):
+        for phase, time in other.times.items():
+            self.times[phase] = self.times.get(phase, 0.0) + time
+            self.calls[phase] = self.calls.get(phase, 0) + other.calls[phase]
+        return self
+
+    def getTotalTime(self):
+        return sum(self.times.values())
+
+    def asDict(self):
+        return {phase: {"time": self.times[phase], "calls": self.calls[phase]} for phase in self.times}
+
+    def __str__(self):
+        total = self.getTotalTime() or 1.0
+        lines = []
+        for phase in sorted(self.times, key=self.times.get, reverse=True):
+            lines.append("{:<12}{:>9.3f}s {:>6.1%} {:>10} calls".format(phase, self.times[phase],
+                                                                      self.times[phase] / total, self.calls[phase]))
+        return "\n".join(lines)
+
+
+def enable():
+    # (can be used as initializer of a process pool)
+    global timer
+    timer = PhaseTimer()
+
+
+def disable():
+    global timer
+    timer = None
+
+
+def collect():
+    """
+    returns the timer of this process and starts a new one (None if disabled)
+    """
+    global timer
+    if timer is None:
+        return None
+    collected, timer = timer, PhaseTimer()
+    return collected
@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from enum import Enum
 
 import pygame
@@ -41,6 +42,71 @@ blocks = (Textures.cobblestone, Textures.stone, Textures.wood_planks, Textures.w
 enemies = (Textures.slime,)
 
 
+class SurfaceCache:
+    """
+    least recently used cache of surfaces derived from textures, so entities with the same texture and size share
+    their pixel data
+    (the surfaces are shared, they must not be drawn on)
+    """
+
+    def __init__(self, maxBytes):
+        self.maxBytes = maxBytes
+        self._surfaces = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key, createFunc):
+        """
+        returns the surface for 'key', creates it with 'createFunc' if it isn't cached
+        """
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+
+        surface = createFunc()
+        self._surfaces[key] = surface
+        self._bytes += surfaceBytes(surface)
+        # evicted surfaces stay alive as long as renderers use them
+        while self._bytes > self.maxBytes and len(self._surfaces) > 1:
+            _, evicted = self._surfaces.popitem(last=False)
+            self._bytes -= surfaceBytes(evicted)
+        return surface
+
+    def getBytes(self):
+        return self._bytes
+
+    def clear(self):
+        self._surfaces.clear()
+        self._bytes = 0
+
+
+def surfaceBytes(surface):
+    return surface.get_bytesize() * surface.get_width() * surface.get_height()
+
+
+# the surfaces of all entity renderers
+surfaceCache = SurfaceCache(64 * 2 ** 20)
+
+
+def scaledSurface(texture, width, height, flipped=False):
+    """
+    the texture scaled to (width, height), horizontally flipped if 'flipped' (shared, see SurfaceCache)
+    """
+    if flipped:
+        return surfaceCache.get(("scaled", texture, width, height, True), lambda: pygame.transform.flip(
+            scaledSurface(texture, width, height), True, False))
+    return surfaceCache.get(("scaled", texture, width, height, False),
+                            lambda: pygame.transform.scale(texture.surface, (width, height)))
+
+
+def tiledSurface(texture, width, height, tileSize=(40, 40)):
+    """
+    a (width, height) surface tiled with the texture scaled to 'tileSize' (shared, see SurfaceCache)
+    """
+    return surfaceCache.get(("tiled", texture, width, height, tileSize), lambda: fillSurface(
+        pygame.Surface((width, height), 0, texture.surface), texture, tileSize))
+
+
 def adjustedSurface(texture, width=-1, height=-1):
     if width == -1:
         adjustedWidth = texture.surface.get_width() * height // texture.surface.get_height()
@@ -54,7 +120,7 @@ def adjustedSurface(texture, width=-1, height=-1):
 
 def fillSurface(surface, texture, desiredDimensions=(40, 40)):
     # scale texture down to the desiredDimensions
-    texture = pygame.transform.scale(texture.surface, desiredDimensions)
+    texture = scaledSurface(texture, *desiredDimensions)
     x = 0
     y = 0
     while y < surface.get_height():
@@ -1,8 +1,20 @@
+import math
+from copy import deepcopy
+
 import lib.constants as const
 from camera import Camera, cameraPosX
-from entity.entityplayer import EntityPlayer
+from entity.entitycoin import EntityCoin
+from entity.entityplayer import EntityPlayer, maxVelocity, moveAcceleration
+from util import instrumentation
 from worldgeneration.worldgen import WorldGen
 
+# maximum time (in seconds) a neuronal network can go on without earning points
+pointsTimeout = 3.5
+# generous upper bound for the horizontal acceleration of the player
+maxAccelerationX = 10 * moveAcceleration
+# time (in seconds) without earning points after which neuronal worlds start to check if the episode is stuck
+stuckCheckDelay = 0.5
+
 
 class World:
     """
@@ -34,22 +46,41 @@ class World:
         # generate the starting platform
         self.worldgen.generateWorldSlice()
 
+    def snapshot(self, memo=None):
+        """
+        copy of the world that can be simulated on independently
+        (static entities never change, so they are shared instead of copied)
+        """
+        memo = {} if memo is None else memo
+        for ent in self.staticEntities:
+            memo[id(ent)] = ent
+        return deepcopy(self, memo)
+
     def update(self, t):
+        # (the phases are only timed if the instrumentation is enabled)
+        timer = instrumentation.timer
+        if timer is not None:
+            timer.start()
         self.time += t
 
         self.visibleStaticEntities = [ent for ent in self.staticEntities if ent.isVisible(self.player)]
         self.visibleDynamicEntities.clear()
         temp = []
-        # sort the visible entities into the list and move them
+        # sort the visible entities into the list
         for ent in self.dynamicEntities:
             if ent.isAlive() and ent.isVisible(self.player):
                 self.visibleDynamicEntities.append(ent)
-                # (calculation was done last frame, so we have to use the last t here)
-                ent.move(self.lastT)
             else:
                 temp.append(ent)
-        # move the player (calculation was done last frame, so we have to use the last t here)
+        if timer is not None:
+            timer.lap("visibility")
+
+        # move the entities and the player (calculation was done last frame, so we have to use the last t here)
+        for ent in self.visibleDynamicEntities:
+            ent.move(self.lastT)
         self.player.move(self.lastT)
+        if timer is not None:
+            timer.lap("move")
 
         # update entities (collision detection/resolve)
         for ent in self.visibleDynamicEntities:
@@ -57,8 +88,12 @@ class World:
                 temp.append(ent)
         # update player
         isAlive = self.player.updateAndIsAlive(self, t)
+        if timer is not None:
+            timer.lap("collision")
         # update the camera
         self.camera.update(t)
+        if timer is not None:
+            timer.lap("camera")
         # update points
         if not self.player._inAir and self.player.getX() > self.furthestX:
             self.points += self.player.getX() - self.furthestX
@@ -72,6 +107,8 @@ class World:
         # create new world slice if needed
         if self.furthestX + cameraPosX * const.screenWidth > self.worldgen.step * 2048:
             self.worldgen.generateWorldSlice()
+            if timer is not None:
+                timer.lap("worldgen")
 
         return isAlive
 
@@ -83,6 +120,8 @@ class World:
                   pygame.key.get_pressed()[Entries.KeyRight.getCurrentValue()],
                   pygame.key.get_pressed()[Entries.KeySpace.getCurrentValue()]]
         self.player.setInput(*inputs)
+        if instrumentation.timer is not None:
+            instrumentation.timer.lap("input")
 
 
 class NeuronalWorld(World):
@@ -90,43 +129,220 @@ class NeuronalWorld(World):
     a world for a single neuronal network
     """
 
-    def __init__(self, seed, nn):
+    def __init__(self, seed, nn, maxTicks=None, detectStuck=True, decisionInterval=1):
         World.__init__(self, seed)
         self.nn = nn
+        # the network is queried every 'decisionInterval' physic updates, its last action is held in between
+        self.decisionInterval = decisionInterval
         self.lastTimePointsEarned = 0
         self.minimapValues = [0] * 18 * 27
         self._running = True
 
+        # number of simulated physic updates and an optional hard cap for them
+        self.ticks = 0
+        self.maxTicks = maxTicks
+        # end episodes early which can't change their outcome anymore
+        self.detectStuck = detectStuck
+        self._seenStates = set()
+        # (key, minimap) of the last minimap at the destination of the camera (see isCameraSettled)
+        self._settledMinimap = (None, None)
+        # why the episode ended ("death", "timeout", "stuck", "unreachable" or "tickLimit")
+        self.endReason = None
+        # gets every decision and every finished physic update (see training.trajectory)
+        self.recorder = None
+
+    def isRunning(self):
+        return self._running
+
     def update(self, t):
         if not self._running:
             return False
 
         lastPoints = self.points
         self._running = World.update(self, t)
+        self.ticks += 1
         if lastPoints < self.points:
             self.lastTimePointsEarned = self.time
+            # states seen before can't repeat with more points
+            self._seenStates.clear()
 
         self.nn.update_fitness(self.points, self.time)
 
-        if self._running:
-            self._running = (self.time - self.lastTimePointsEarned <= 3.5)
+        if not self._running:
+            self.endReason = "death"
+        elif self.time - self.lastTimePointsEarned > pointsTimeout:
+            self._running = False
+            self.endReason = "timeout"
+        elif self.maxTicks is not None and self.ticks >= self.maxTicks:
+            self._running = False
+            self.endReason = "tickLimit"
+        elif self.detectStuck and self.time - self.lastTimePointsEarned >= stuckCheckDelay:
+            # (only when the player doesn't make progress anyway, and only right after decisions, a loop of states
+            # returns to them as well)
+            if (self.ticks - 1) % self.decisionInterval == 0 and self.isRepeatingState(t):
+                self.endEpisode(t, "stuck")
+            elif not self.canEarnPoints(t):
+                self.endEpisode(t, "unreachable")
 
+        if self.recorder is not None and self._running:
+            self.recorder.tick(self)
+        # fitness, end of the episode and recording
+        if instrumentation.timer is not None:
+            instrumentation.timer.lap("episode")
         return self._running
 
     def handleInput(self):
+        timer = instrumentation.timer
+        # ('ticks' is incremented after the update, so the first update is always a decision)
+        if self.ticks % self.decisionInterval != 0:
+            return
         self.createMinimapValues()
+        if timer is not None:
+            timer.lap("minimap")
         if self.points > 0:
-            self.player.setInput(*self.nn.evaluate(self.minimapValues))
+            action = self.nn.evaluate(self.minimapValues)
+            if timer is not None:
+                timer.lap("network")
+            if self.recorder is not None:
+                self.recorder.decision(self, action)
+            self.player.setInput(*action)
 
     def createMinimapValues(self):
-        self.minimapValues = [0] * (18 * 27)
+        self.minimapValues = self.calculateMinimapValues(self.camera.getX(), self.camera.getY())
+
+    def calculateMinimapValues(self, cameraX, cameraY):
+        minimapValues = [0] * (18 * 27)
 
         for entity in self.visibleStaticEntities + self.visibleDynamicEntities:
-            x, y = entity.getCamRelPos(self.camera)
+            x, y = entity.getX() - cameraX, entity.getY() - cameraY
             x, y = int(x) // 40, int(y) // 40
             tilesX = max(round(entity.getWidth() / 40), 1)
             tilesY = max(round(entity.getHeight() / 40), 1)
             for xx in range(x, x + tilesX):
                 for yy in range(y, y + tilesY):
                     if 0 <= xx < 27 and 0 <= yy < 18:
-                        self.minimapValues[yy * 27 + xx] = entity.getMinimapID()
+                        minimapValues[yy * 27 + xx] = entity.getMinimapID()
+        return minimapValues
+
+    def stateHash(self, t):
+        """
+        hash of everything the further course of the episode depends on, right after a decision
+        (the simulation and the network are both deterministic, and the minimap follows from the camera and the entities)
+        """
+        player = self.player
+        # the camera only matters for the minimap, it's left out once it can't change the minimap anymore
+        camera = None if self.isCameraSettled() else (self.camera.getX(), self.camera.getY())
+        livings = tuple(_kinematicState(ent) for ent in self.visibleDynamicEntities if ent.isAlive())
+        return hash((_playerState(player, t), player._inAir, player.invulTimer, player.leftDown, player.rightDown,
+                     player.jumpDown, camera, self.points, self.furthestX, self.nn.get_fitness() < 0, livings))
+
+    def isCameraSettled(self):
+        """
+        checks if the player stands still and the camera can't change the minimap anymore on its way to the player
+        (the camera moves monotonically, so it's enough to compare the minimap of the last decision with the one at its
+        destination, which is kept while the player and the visible enemies stand still)
+        """
+        player = self.player
+        if player._inAir or player._velocityX != 0 or (player.getX(), player.getY()) != (player._lastX, player._lastY):
+            return False
+        key = (self.camera.getDestination(), tuple((ent.getX(), ent.getY()) for ent in self.visibleDynamicEntities))
+        if self._settledMinimap[0] != key:
+            self._settledMinimap = (key, self.calculateMinimapValues(*key[0]))
+        return self._settledMinimap[1] == self.minimapValues
+
+    def isRepeatingState(self, t):
+        """
+        checks if the current state was already seen since points were earned the last time,
+        in which case the episode loops until the timeout
+        """
+        state = self.stateHash(t)
+        if state not in self._seenStates:
+            self._seenStates.add(state)
+            return False
+
+        # a network with negative fitness gets disabled, so the loop only lasts if that doesn't happen before the end
+        endFitness = self.nn.calculate_fitness(self.points, self.timeoutTime(t))
+        return (endFitness < 0) == (self.nn.get_fitness() < 0)
+
+    def canEarnPoints(self, t):
+        """
+        checks if the player could reach any point-earning region (unexplored ground, coins or enemies)
+        before the timeout, even when moving at maximum speed
+        """
+        # only decide on solid ground and without nearby enemies, dying or getting hurt would change the outcome
+        if self.player._inAir or any(not isinstance(ent, EntityCoin) for ent in self.visibleDynamicEntities):
+            return True
+
+        ticksLeft = math.ceil((self.lastTimePointsEarned + pointsTimeout - self.time) / t) + 2
+        reach = ticksLeft * 100.0 * (maxVelocity * t + 0.5 * maxAccelerationX * t * t)
+
+        left = self.player.getX() - reach
+        right = self.player.getX() + self.player.getWidth() + reach
+        if right > self.furthestX:
+            return True
+
+        for ent in self.dynamicEntities:
+            if not ent.isAlive():
+                continue
+            # enemies move as well, so (generously) assume they are as fast as the player
+            extra = 0 if isinstance(ent, EntityCoin) else reach + const.dynamicUpdateDist * const.screenWidth
+            if ent.getX() + ent.getWidth() >= left - extra and ent.getX() <= right + extra:
+                return True
+        return False
+
+    def timeoutTime(self, t):
+        """
+        the world time at which the episode ends when no more points are earned
+        """
+        time = self.time
+        while time - self.lastTimePointsEarned <= pointsTimeout:
+            time += t
+        return time
+
+    def projectedFitness(self, t):
+        """
+        the fitness the network will have if it doesn't earn any more points
+        """
+        return self.nn.calculate_fitness(self.points, self.timeoutTime(t))
+
+    def snapshot(self, nn=None):
+        """
+        copy of the world that continues the episode with the network 'nn' (None for no network yet)
+        """
+        # the network, the recorder and the renderer aren't part of the state
+        memo = {id(self.recorder): None}
+        if self.nn is not None:
+            memo[id(self.nn)] = None
+        if hasattr(self, "renderer"):
+            memo[id(self.renderer)] = None
+        world = World.snapshot(self, memo)
+        world.nn = nn
+        if nn is not None:
+            nn.update_fitness(world.points, world.time)
+        return world
+
+    def endEpisode(self, t, reason):
+        """
+        ends the episode immediately with the fitness it would have reached at the timeout
+        """
+        self.time = self.timeoutTime(t)
+        self.nn.update_fitness(self.points, self.time)
+        self._running = False
+        self.endReason = reason
+
+
+def _kinematicState(entity):
+    return (entity.getX(), entity.getY(), entity._velocityX, entity._velocityY, entity._accelerationX,
+            entity._accelerationY, entity.state)
+
+
+def _playerState(player, t):
+    # the "wind resistance" of a standing player leaves a horizontal acceleration that decays without reaching zero,
+    # but once it vanishes next to every acceleration and position it's added to (and the velocity is snapped to zero
+    # anyway), it can't change anything anymore
+    state = _kinematicState(player)
+    acceleration = player._accelerationX
+    if (player._velocityX == 0 and moveAcceleration + acceleration == moveAcceleration
+            and player.getX() + 50.0 * acceleration * t * t == player.getX()):
+        state = state[:4] + (0,) + state[5:]
+    return state
@@ -1,8 +1,22 @@
 import random
 
+from entity.entitycoin import EntityCoin
+from entity.entityenemy import EntityEnemy
 from render import renderentity
 from util import texturehandler
 from worldgeneration.entityfactory import EntityFactory
+from worldgeneration.worldgen import getSliceIndex
+
+
+def getBlockTexture(x):
+    """
+    the texture of the blocks of the world slice at the x coordinate, the first slice is made of cobblestone
+    (it only depends on the slice, so blocks get the same texture however their renderer is created)
+    """
+    index = getSliceIndex(x)
+    if index == 0:
+        return texturehandler.Textures.cobblestone
+    return texturehandler.blocks[random.Random(index).randrange(len(texturehandler.blocks))]
 
 
 class RenderEntityFactory(EntityFactory):
@@ -12,14 +26,10 @@ class RenderEntityFactory(EntityFactory):
 
     def __init__(self):
         EntityFactory.__init__(self)
-        self.currenttexture = texturehandler.Textures.cobblestone
-
-    def chooseRandomTexture(self):
-        self.currenttexture = random.choice(texturehandler.blocks)
 
     def createBlock(self, x, y, w, h):
         entity = EntityFactory.createBlock(self, x, y, w, h)
-        entity.renderer = renderentity.RenderBase(entity, self.currenttexture)
+        entity.renderer = renderentity.RenderBase(entity, getBlockTexture(x))
         return entity
 
     def createCoin(self, x, y):
@@ -33,6 +43,14 @@ class RenderEntityFactory(EntityFactory):
         entity.renderer = renderentity.RenderLiving(entity, random.choice(texturehandler.enemies))
         return entity
 
-    def cycle(self):
-        # reset texture for next cycle
-        self.chooseRandomTexture()
+    def attachRenderer(self, entity):
+        """
+        attaches a renderer to an entity that was created by a headless factory
+        (blocks get the texture of the world slice they belong to, like the ones created by this factory)
+        """
+        if isinstance(entity, EntityEnemy):
+            entity.renderer = renderentity.RenderLiving(entity, random.choice(texturehandler.enemies))
+        elif isinstance(entity, EntityCoin):
+            entity.renderer = renderentity.RenderBase(entity, texturehandler.Textures.coin)
+        else:
+            entity.renderer = renderentity.RenderBase(entity, getBlockTexture(entity.getX()))
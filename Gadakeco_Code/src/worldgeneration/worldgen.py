@@ -143,6 +143,13 @@ class WorldSlice():
 worldSlices = WorldSlice.parseAll()
 
 
+def getSliceIndex(x):
+    """
+    the 'step' of the world slice that was generated at the x coordinate (the starting platform belongs to the first)
+    """
+    return max(int((x - screenWidth) // (2 * screenWidth)), 0)
+
+
 class WorldGen:
     def __init__(self, world):
         self._world = world